@@ -2,10 +2,12 @@ from .base_agent import BaseAgent
 from .customer_service_agent import CustomerServiceAgent
 from .technical_support_agent import TechnicalSupportAgent
 from .sales_specialist_agent import SalesSpecialistAgent
+from .semantic_cache import SemanticResponseCache
 
 __all__ = [
     "BaseAgent",
     "CustomerServiceAgent",
     "TechnicalSupportAgent",
     "SalesSpecialistAgent",
+    "SemanticResponseCache",
 ]
\ No newline at end of file
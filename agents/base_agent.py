@@ -1,18 +1,95 @@
 import asyncio
+import re
+import sys
+import threading
 import time
+from collections import OrderedDict
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Any, Tuple
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Optional, Any, Sequence, Tuple
 from datetime import datetime
 import structlog
+import ahocorasick
 from google.cloud import aiplatform
 from vertexai.generative_models import GenerativeModel, Content, Part
-from tenacity import retry, stop_after_attempt, wait_exponential
 
+from agents.request_limiter import get_request_limiter
+from agents.semantic_cache import SemanticResponseCache
 from models.message import Message, MessageRole, ConversationContext
 from utils.logging_config import get_logger
 
+try:
+    import hyperscan
+except ImportError:  # Hyperscan is only available on x86-64
+    hyperscan = None
+
 logger = get_logger(__name__)
 
+# GenerativeModel instances shared by agents with identical generation config
+_model_cache: Dict[Tuple, GenerativeModel] = {}
+_model_cache_lock = threading.Lock()
+
+# Role member bound once for identity checks when rendering history
+_USER = MessageRole.USER
+
+# Attempts per Vertex AI generation before giving up
+_GENERATION_ATTEMPTS = 3
+
+# Letters used to spot consonant doubling when inflecting patterns
+_VOWELS = frozenset("aeiou")
+_VOWELS_WXY = _VOWELS | frozenset("wxy")
+
+# Frustration indicators that route any agent to a supervisor
+_FRUSTRATION_INDICATORS = (
+    "frustrated", "angry", "upset", "terrible",
+    "worst", "horrible", "unacceptable", "speak to manager",
+)
+
+
+@dataclass(slots=True)
+class AgentMetrics:
+    """Performance counters for a single agent."""
+    
+    total_requests: int = 0
+    successful_responses: int = 0
+    failed_responses: int = 0
+    total_response_time_ns: int = 0
+    escalations: int = 0
+
+
+def _inflections(pattern: str) -> Tuple[str, ...]:
+    """Common inflected forms of a pattern's last word."""
+    forms = [pattern + "s", pattern + "es", pattern + "ed", pattern + "ing"]
+    if pattern.endswith("e"):
+        forms += [pattern + "d", pattern[:-1] + "ing"]
+    elif pattern.endswith("y"):
+        forms += [pattern[:-1] + "ies", pattern[:-1] + "ied"]
+    elif (
+        len(pattern) >= 3
+        and pattern[-1] not in _VOWELS_WXY
+        and pattern[-2] in _VOWELS
+        and pattern[-3] not in _VOWELS
+    ):
+        # Consonant doubling, as in "plan" -> "planned"
+        forms += [pattern + pattern[-1] + "ed", pattern + pattern[-1] + "ing"]
+    return tuple(forms)
+
+
+def _merge_routes(
+    first: Optional[Tuple[int, str]], second: Optional[Tuple[int, str]]
+) -> Optional[Tuple[int, str]]:
+    """Keep the higher-priority of two routes."""
+    if first is None or (second is not None and second < first):
+        return second
+    return first
+
+
+def _is_token(text: str, start: int, end: int) -> bool:
+    """Check whether text[start:end] is bounded by token boundaries."""
+    return (start == 0 or not text[start - 1].isalnum()) and (
+        end == len(text) or not text[end].isalnum()
+    )
+
 
 class BaseAgent(ABC):
     """Abstract base class for all AI agents in the system."""
@@ -27,36 +104,57 @@ class BaseAgent(ABC):
         top_p: float = 0.95,
         project_id: Optional[str] = None,
         location: str = "us-central1",
+        response_cache_size: int = 1024,
+        semantic_cache: Optional[SemanticResponseCache] = None,
+        health_check_interval: float = 30.0,
     ):
-        self.agent_id = agent_id
-        self.agent_type = agent_type
-        self.model_name = model_name
+        # Interned so every response message shares the same string objects
+        self.agent_id = sys.intern(agent_id)
+        self.agent_type = sys.intern(agent_type)
+        self.model_name = sys.intern(model_name)
         self.temperature = temperature
         self.max_output_tokens = max_output_tokens
         self.top_p = top_p
         self.project_id = project_id
         self.location = location
         
+        # Exact-match response cache, only for low-temperature agents whose
+        # answers are deterministic enough to be reused
+        self.response_cache_size = response_cache_size
+        self._cache_responses = temperature < 0.4 and response_cache_size > 0
+        self._response_cache: "OrderedDict[Tuple[str, int, str], str]" = OrderedDict()
+        
+        # Optional similarity cache shared across agents for paraphrased repeats
+        self.semantic_cache = semantic_cache if self._cache_responses else None
+        
+        # Static part of the metadata attached to every response message
+        self._metadata_template = {"model": self.model_name}
+        
         # Performance metrics
-        self.metrics = {
-            "total_requests": 0,
-            "successful_responses": 0,
-            "failed_responses": 0,
-            "total_response_time": 0.0,
-            "escalations": 0,
-        }
+        self.metrics = AgentMetrics()
+        
+        # Logger carrying the agent's identity on every line
+        self.logger = logger.bind(agent_id=self.agent_id, agent_type=self.agent_type)
+        
+        # Latest result of the periodic background health probe
+        self.health_check_interval = health_check_interval
+        self._health_status: Optional[Dict[str, Any]] = None
+        self._health_task: Optional[asyncio.Task] = None
         
         # Initialize Vertex AI
         self._initialize_vertex_ai()
         
         # Agent-specific configuration
         self.system_prompt = self._get_system_prompt()
+        self._system_content = Content(
+            role="user", parts=[Part.from_text(self.system_prompt)]
+        )
         self.escalation_keywords = self._get_escalation_keywords()
+        self._escalation_patterns = self._build_escalation_patterns()
+        self._escalation_matcher = self._build_escalation_matcher()
         
-        logger.info(
+        self.logger.info(
             "agent_initialized",
-            agent_id=self.agent_id,
-            agent_type=self.agent_type,
             model=self.model_name,
             temperature=self.temperature,
         )
@@ -67,14 +165,32 @@ class BaseAgent(ABC):
             if self.project_id:
                 aiplatform.init(project=self.project_id, location=self.location)
             
-            self.model = GenerativeModel(
+            config_key = (
+                self.project_id,
+                self.location,
                 self.model_name,
-                generation_config={
-                    "temperature": self.temperature,
-                    "max_output_tokens": self.max_output_tokens,
-                    "top_p": self.top_p,
-                }
+                self.temperature,
+                self.max_output_tokens,
+                self.top_p,
             )
+            
+            with _model_cache_lock:
+                model = _model_cache.get(config_key)
+                if model is None:
+                    model = GenerativeModel(
+                        self.model_name,
+                        generation_config={
+                            "temperature": self.temperature,
+                            "max_output_tokens": self.max_output_tokens,
+                            "top_p": self.top_p,
+                        }
+                    )
+                    _model_cache[config_key] = model
+                
+                # Agents with the same generation config share one concurrency cap
+                self._limiter = get_request_limiter(model, config_key)
+            
+            self.model = model
             logger.info("vertex_ai_initialized", model=self.model_name)
         except Exception as e:
             logger.error("vertex_ai_initialization_failed", error=str(e))
@@ -86,12 +202,12 @@ class BaseAgent(ABC):
         pass
     
     @abstractmethod
-    def _get_escalation_keywords(self) -> List[str]:
+    def _get_escalation_keywords(self) -> Sequence[str]:
         """Get keywords that trigger escalation for this agent."""
         pass
     
     @abstractmethod
-    def _get_routing_rules(self) -> Dict[str, str]:
+    def _get_routing_rules(self) -> Mapping[str, str]:
         """Get routing rules for this agent."""
         pass
     
@@ -107,52 +223,50 @@ class BaseAgent(ABC):
         Returns:
             Tuple of (response_message, escalation_target_agent_type)
         """
-        start_time = time.time()
-        self.metrics["total_requests"] += 1
+        start_ns = time.perf_counter_ns()
+        self.metrics.total_requests += 1
+        
+        # Bind request fields once for every log line emitted below
+        log_context = structlog.contextvars.bind_contextvars(
+            session_id=session_id,
+            agent_id=self.agent_id,
+            agent_type=self.agent_type,
+        )
         
         try:
             # Check for escalation triggers
-            escalation_target = await self._check_escalation(message, context)
+            escalation_target = self._check_escalation(message, context)
             
             # Generate response using Vertex AI
             response_content = await self._generate_response(message, context)
+            elapsed_ns = time.perf_counter_ns() - start_ns
             
             # Create response message
-            response_message = Message(
+            response_message = Message.create(
                 role=MessageRole.ASSISTANT,
                 content=response_content,
                 agent_id=self.agent_id,
                 agent_type=self.agent_type,
                 metadata={
+                    **self._metadata_template,
                     "session_id": session_id,
-                    "processing_time": time.time() - start_time,
-                    "model": self.model_name,
+                    "processing_time": elapsed_ns / 1e9,
                 }
             )
             
             # Update metrics
-            self.metrics["successful_responses"] += 1
-            self.metrics["total_response_time"] += time.time() - start_time
+            self.metrics.successful_responses += 1
+            self.metrics.total_response_time_ns += elapsed_ns
             
             if escalation_target:
-                self.metrics["escalations"] += 1
-                logger.info(
-                    "escalation_triggered",
-                    session_id=session_id,
-                    from_agent=self.agent_type,
-                    to_agent=escalation_target,
-                )
+                self.metrics.escalations += 1
+                logger.info("escalation_triggered", to_agent=escalation_target)
             
             return response_message, escalation_target
             
         except Exception as e:
-            self.metrics["failed_responses"] += 1
-            logger.error(
-                "message_processing_failed",
-                session_id=session_id,
-                error=str(e),
-                agent_id=self.agent_id,
-            )
+            self.metrics.failed_responses += 1
+            logger.error("message_processing_failed", error=str(e))
             
             # Return fallback response
             fallback_message = Message(
@@ -163,73 +277,235 @@ class BaseAgent(ABC):
                 metadata={"error": str(e), "session_id": session_id},
             )
             return fallback_message, None
+        
+        finally:
+            structlog.contextvars.reset_contextvars(**log_context)
     
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10),
-    )
     async def _generate_response(
         self, message: Message, context: ConversationContext
     ) -> str:
         """Generate response using Vertex AI with retry logic."""
-        try:
-            # Prepare conversation history
-            history = self._prepare_conversation_history(context)
-            
-            # Add system prompt
-            full_prompt = f"{self.system_prompt}\n\n{history}\n\nUser: {message.content}\nAssistant:"
-            
-            # Generate response
-            response = await asyncio.to_thread(
-                self.model.generate_content, full_prompt
+        # Serve repeated requests from the response cache
+        cache_key = None
+        if self._cache_responses:
+            cache_key = self._get_response_cache_key(context, message)
+            cached_response = self._response_cache.get(cache_key)
+            if cached_response is not None:
+                self._response_cache.move_to_end(cache_key)
+                return cached_response
+        
+        # Fall back to the semantic cache for paraphrased requests
+        embedding = None
+        if self.semantic_cache is not None:
+            embedding = await self.semantic_cache.embed(message.content)
+            if embedding is not None:
+                cached_response = self.semantic_cache.lookup(
+                    self.agent_type, cache_key[1], embedding
+                )
+                if cached_response is not None:
+                    return cached_response
+        
+        # Prepare system prompt, conversation history and current turn
+        contents = self._prepare_conversation_history(context, message)
+        
+        # Generate response, retrying with exponential backoff (4s, 8s)
+        for attempt in range(_GENERATION_ATTEMPTS):
+            try:
+                response = await self._limiter.generate(contents)
+                response_text = response.text.strip()
+                break
+            except Exception as e:
+                logger.error(
+                    "vertex_ai_generation_failed",
+                    attempt=attempt + 1,
+                    error=str(e),
+                )
+                if attempt == _GENERATION_ATTEMPTS - 1:
+                    raise
+                await asyncio.sleep(min(10, 4 * 2 ** attempt))
+        
+        if cache_key is not None:
+            self._response_cache[cache_key] = response_text
+            if len(self._response_cache) > self.response_cache_size:
+                self._response_cache.popitem(last=False)
+        
+        if embedding is not None:
+            self.semantic_cache.store(
+                self.agent_type, cache_key[1], embedding, response_text
             )
-            
-            return response.text.strip()
-            
-        except Exception as e:
-            logger.error(
-                "vertex_ai_generation_failed",
-                error=str(e),
-                agent_id=self.agent_id,
+        
+        return response_text
+    
+    def _get_response_cache_key(
+        self, context: ConversationContext, message: Message
+    ) -> Tuple[str, int, str]:
+        """Build the response cache key from agent type, history and message."""
+        history_hash = hash(tuple(
+            (msg.role, msg.content)
+            for msg in context.get_recent_messages()
+            if msg.id != message.id
+        ))
+        return (self.agent_type, history_hash, message.content_lower.strip())
+    
+    def _prepare_conversation_history(
+        self, context: ConversationContext, message: Message
+    ) -> List[Content]:
+        """
+        Prepare conversation history for the model.
+        
+        The system prompt is always sent as the same leading Content block and
+        each turn as its own Content, so only the tail changes between requests
+        and the prefix stays eligible for provider-side prompt caching.
+        """
+        contents = [self._system_content]
+        
+        current_content = None
+        
+        # Include recent messages (last 10), rendered once per conversation
+        for message_id, content in context.get_rendered_history(self._to_content):
+            # The current message is always sent as the final turn
+            if message_id == message.id:
+                current_content = content
+                continue
+            contents.append(content)
+        
+        contents.append(current_content or self._to_content(message))
+        
+        return contents
+    
+    @staticmethod
+    def _to_content(message: Message) -> Content:
+        """Convert a conversation message into a model Content turn."""
+        role = "user" if message.role is _USER else "model"
+        return Content(role=role, parts=[Part.from_text(message.content)])
+    
+    def _build_escalation_patterns(
+        self,
+    ) -> List[Tuple[str, bool, Optional[Tuple[int, str]], bool]]:
+        """
+        Merge escalation keywords, routing rules and frustration indicators.
+        
+        Each pattern maps to a tuple of
+        (pattern, is_escalation_keyword, route, is_frustration_indicator),
+        where route is (rule_rank, routing_target) so routes order by the
+        position of their rule in the routing rules. Matches must be whole
+        tokens, so common inflections of every pattern are added as well.
+        """
+        patterns: Dict[str, Tuple[bool, Optional[Tuple[int, str]], bool]] = {}
+        
+        for keyword in self.escalation_keywords:
+            _, route, frustrated = patterns.get(keyword, (False, None, False))
+            patterns[keyword] = (True, route, frustrated)
+        
+        for rank, (pattern, target_agent) in enumerate(self._get_routing_rules().items()):
+            escalates, _, frustrated = patterns.get(pattern, (False, None, False))
+            patterns[pattern] = (escalates, (rank, target_agent), frustrated)
+        
+        for indicator in _FRUSTRATION_INDICATORS:
+            escalates, route, _ = patterns.get(indicator, (False, None, False))
+            patterns[indicator] = (escalates, route, True)
+        
+        for pattern, (escalates, route, frustrated) in list(patterns.items()):
+            for form in _inflections(pattern):
+                form_escalates, form_route, form_frustrated = patterns.get(
+                    form, (False, None, False)
+                )
+                patterns[form] = (
+                    escalates or form_escalates,
+                    _merge_routes(route, form_route),
+                    frustrated or form_frustrated,
+                )
+        
+        return [(pattern, *value) for pattern, value in patterns.items()]
+    
+    def _build_escalation_matcher(self) -> Any:
+        """
+        Compile all escalation patterns into a single matcher.
+        
+        Uses a Hyperscan database when available and falls back to an
+        Aho-Corasick automaton otherwise.
+        """
+        if hyperscan is not None:
+            database = hyperscan.Database()
+            database.compile(
+                expressions=[
+                    re.escape(pattern).encode()
+                    for pattern, *_ in self._escalation_patterns
+                ],
+                ids=list(range(len(self._escalation_patterns))),
+                elements=len(self._escalation_patterns),
+                flags=hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SOM_LEFTMOST,
             )
-            raise
+            return database
+        
+        automaton = ahocorasick.Automaton()
+        for index, (pattern, *_) in enumerate(self._escalation_patterns):
+            automaton.add_word(pattern, (index, len(pattern)))
+        automaton.make_automaton()
+        
+        return automaton
     
-    def _prepare_conversation_history(self, context: ConversationContext) -> str:
-        """Prepare conversation history for the model."""
-        history_parts = []
+    def _find_escalation_matches(
+        self, message_lower: str
+    ) -> List[Tuple[str, bool, Optional[Tuple[int, str]], bool]]:
+        """Find escalation patterns matching whole tokens, in order."""
+        matches = []
         
-        # Include recent messages (last 10)
-        recent_messages = context.messages[-10:]
+        # Only accept whole-token matches, so "bug" does not match inside
+        # "debug" and "plan" does not match inside "plant"; inflections such
+        # as "crashing" are patterns of their own
+        if hyperscan is not None:
+            data = message_lower.encode()
+            
+            # Hyperscan reports UTF-8 byte offsets; map them back to str
+            # indices so the boundary check matches the Aho-Corasick path
+            char_index = None
+            if len(data) != len(message_lower):
+                char_index = []
+                for index, char in enumerate(message_lower):
+                    char_index.extend([index] * len(char.encode()))
+                char_index.append(len(message_lower))
+            
+            def on_match(index, start_index, end_index, flags, context):
+                if char_index is not None:
+                    start_index = char_index[start_index]
+                    end_index = char_index[end_index]
+                if _is_token(message_lower, start_index, end_index):
+                    matches.append(self._escalation_patterns[index])
+            
+            self._escalation_matcher.scan(data, match_event_handler=on_match)
+            return matches
         
-        for msg in recent_messages:
-            role = "User" if msg.role == MessageRole.USER else "Assistant"
-            history_parts.append(f"{role}: {msg.content}")
+        for end_index, (index, length) in self._escalation_matcher.iter(message_lower):
+            if _is_token(message_lower, end_index - length + 1, end_index + 1):
+                matches.append(self._escalation_patterns[index])
         
-        return "\n".join(history_parts)
+        return matches
     
-    async def _check_escalation(
+    def _check_escalation(
         self, message: Message, context: ConversationContext
     ) -> Optional[str]:
         """Check if the message requires escalation to another agent."""
-        message_lower = message.content.lower()
+        escalation_requested = False
+        route = None
+        frustrated = False
         
-        # Check escalation keywords
-        for keyword in self.escalation_keywords:
-            if keyword in message_lower:
-                # Determine target agent based on routing rules
-                routing_rules = self._get_routing_rules()
-                
-                for pattern, target_agent in routing_rules.items():
-                    if pattern in message_lower:
-                        return target_agent
+        # Single linear pass over the message for all patterns
+        for _, escalates, match_route, frustration in self._find_escalation_matches(
+            message.content_lower
+        ):
+            escalation_requested = escalation_requested or escalates
+            frustrated = frustrated or frustration
+            if match_route is not None and (route is None or match_route < route):
+                route = match_route
         
-        # Check sentiment for frustration (simplified)
-        frustration_indicators = [
-            "frustrated", "angry", "upset", "terrible",
-            "worst", "horrible", "unacceptable", "speak to manager"
-        ]
+        # Escalation keywords route to the first matching routing rule, in
+        # rule order rather than message order
+        if escalation_requested and route:
+            return route[1]
         
-        if any(indicator in message_lower for indicator in frustration_indicators):
+        # Check sentiment for frustration (simplified)
+        if frustrated:
             return "supervisor"
         
         return None
@@ -244,33 +520,71 @@ class BaseAgent(ABC):
     
     def get_metrics(self) -> Dict[str, Any]:
         """Get current agent metrics."""
+        metrics = self.metrics
         avg_response_time = (
-            self.metrics["total_response_time"] / self.metrics["successful_responses"]
-            if self.metrics["successful_responses"] > 0
+            metrics.total_response_time_ns / metrics.successful_responses / 1e9
+            if metrics.successful_responses > 0
             else 0
         )
         
         return {
             "agent_id": self.agent_id,
             "agent_type": self.agent_type,
-            "total_requests": self.metrics["total_requests"],
-            "successful_responses": self.metrics["successful_responses"],
-            "failed_responses": self.metrics["failed_responses"],
+            "total_requests": metrics.total_requests,
+            "successful_responses": metrics.successful_responses,
+            "failed_responses": metrics.failed_responses,
             "average_response_time": avg_response_time,
-            "escalations": self.metrics["escalations"],
+            "escalations": metrics.escalations,
             "success_rate": (
-                self.metrics["successful_responses"] / self.metrics["total_requests"]
-                if self.metrics["total_requests"] > 0
+                metrics.successful_responses / metrics.total_requests
+                if metrics.total_requests > 0
                 else 0
             ),
         }
     
     async def health_check(self) -> Dict[str, Any]:
+        """
+        Get the health of the agent.
+        
+        Model connectivity is probed by a background task every
+        health_check_interval seconds, so this returns the latest cached probe
+        result and only probes inline before the first result is available.
+        """
+        if self._health_task is None or self._health_task.done():
+            self._health_task = asyncio.create_task(self._health_probe_loop())
+        
+        if self._health_status is None:
+            self._health_status = await self._probe_health()
+        
+        health = self._health_status
+        if health["status"] == "healthy":
+            health = {**health, "metrics": self.get_metrics()}
+        
+        return health
+    
+    async def close(self):
+        """Stop the background health probe."""
+        if self._health_task:
+            self._health_task.cancel()
+            await asyncio.gather(self._health_task, return_exceptions=True)
+            self._health_task = None
+    
+    async def _health_probe_loop(self):
+        """Background task to refresh the cached health status."""
+        while True:
+            try:
+                await asyncio.sleep(self.health_check_interval)
+                self._health_status = await self._probe_health()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                self.logger.error("health_probe_error", error=str(e))
+    
+    async def _probe_health(self) -> Dict[str, Any]:
         """Perform health check on the agent."""
         try:
             # Test model connectivity
-            test_response = await asyncio.to_thread(
-                self.model.generate_content,
+            test_response = await self.model.generate_content_async(
                 "Respond with 'OK' if you're operational."
             )
             
@@ -279,7 +593,6 @@ class BaseAgent(ABC):
                 "agent_id": self.agent_id,
                 "agent_type": self.agent_type,
                 "model": self.model_name,
-                "metrics": self.get_metrics(),
                 "timestamp": datetime.utcnow().isoformat(),
             }
         except Exception as e:
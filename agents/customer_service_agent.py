@@ -1,4 +1,5 @@
-from typing import List, Dict
+from types import MappingProxyType
+from typing import Mapping, Tuple
 from agents.base_agent import BaseAgent
 
 
@@ -8,15 +9,7 @@ class CustomerServiceAgent(BaseAgent):
     Temperature: 0.3 for professional, consistent responses.
     """
     
-    def __init__(self, **kwargs):
-        # Set default temperature for customer service
-        kwargs.setdefault('temperature', 0.3)
-        kwargs.setdefault('agent_type', 'customer_service')
-        super().__init__(**kwargs)
-    
-    def _get_system_prompt(self) -> str:
-        """Get the system prompt for customer service agent."""
-        return """You are a professional customer service representative for our company. 
+    SYSTEM_PROMPT = """You are a professional customer service representative for our company. 
 Your role is to:
 
 1. Greet customers warmly and professionally
@@ -42,53 +35,69 @@ You should identify when to route conversations to:
 
 Remember: You are the first point of contact and set the tone for the entire interaction."""
     
-    def _get_escalation_keywords(self) -> List[str]:
+    # Keywords that might trigger escalation
+    ESCALATION_KEYWORDS = (
+        # Technical issues
+        "not working", "broken", "error", "bug", "crash", 
+        "technical", "problem", "issue", "troubleshoot",
+        # Sales related
+        "buy", "purchase", "price", "cost", "discount", 
+        "quote", "proposal", "compare", "upgrade",
+        # Escalation triggers
+        "manager", "supervisor", "escalate", "complaint",
+        "frustrated", "unacceptable", "terrible service",
+    )
+    
+    # Routing rules based on keywords
+    ROUTING_RULES = MappingProxyType({
+        # Technical support routing
+        "not working": "technical_support",
+        "broken": "technical_support",
+        "error": "technical_support",
+        "bug": "technical_support",
+        "crash": "technical_support",
+        "technical issue": "technical_support",
+        "troubleshoot": "technical_support",
+        "installation": "technical_support",
+        "configuration": "technical_support",
+        
+        # Sales routing
+        "buy": "sales_specialist",
+        "purchase": "sales_specialist",
+        "pricing": "sales_specialist",
+        "cost": "sales_specialist",
+        "discount": "sales_specialist",
+        "quote": "sales_specialist",
+        "proposal": "sales_specialist",
+        "compare products": "sales_specialist",
+        "upgrade": "sales_specialist",
+        "subscription": "sales_specialist",
+        "plan": "sales_specialist",
+        
+        # Supervisor routing
+        "speak to manager": "supervisor",
+        "supervisor": "supervisor",
+        "escalate": "supervisor",
+        "file complaint": "supervisor",
+        "very frustrated": "supervisor",
+        "legal": "supervisor",
+        "lawsuit": "supervisor",
+    })
+    
+    def __init__(self, **kwargs):
+        # Set default temperature for customer service
+        kwargs.setdefault('temperature', 0.3)
+        kwargs.setdefault('agent_type', 'customer_service')
+        super().__init__(**kwargs)
+    
+    def _get_system_prompt(self) -> str:
+        """Get the system prompt for customer service agent."""
+        return self.SYSTEM_PROMPT
+    
+    def _get_escalation_keywords(self) -> Tuple[str, ...]:
         """Keywords that might trigger escalation."""
-        return [
-            # Technical issues
-            "not working", "broken", "error", "bug", "crash", 
-            "technical", "problem", "issue", "troubleshoot",
-            # Sales related
-            "buy", "purchase", "price", "cost", "discount", 
-            "quote", "proposal", "compare", "upgrade",
-            # Escalation triggers
-            "manager", "supervisor", "escalate", "complaint",
-            "frustrated", "unacceptable", "terrible service"
-        ]
+        return self.ESCALATION_KEYWORDS
     
-    def _get_routing_rules(self) -> Dict[str, str]:
+    def _get_routing_rules(self) -> Mapping[str, str]:
         """Define routing rules based on keywords."""
-        return {
-            # Technical support routing
-            "not working": "technical_support",
-            "broken": "technical_support",
-            "error": "technical_support",
-            "bug": "technical_support",
-            "crash": "technical_support",
-            "technical issue": "technical_support",
-            "troubleshoot": "technical_support",
-            "installation": "technical_support",
-            "configuration": "technical_support",
-            
-            # Sales routing
-            "buy": "sales_specialist",
-            "purchase": "sales_specialist",
-            "pricing": "sales_specialist",
-            "cost": "sales_specialist",
-            "discount": "sales_specialist",
-            "quote": "sales_specialist",
-            "proposal": "sales_specialist",
-            "compare products": "sales_specialist",
-            "upgrade": "sales_specialist",
-            "subscription": "sales_specialist",
-            "plan": "sales_specialist",
-            
-            # Supervisor routing
-            "speak to manager": "supervisor",
-            "supervisor": "supervisor",
-            "escalate": "supervisor",
-            "file complaint": "supervisor",
-            "very frustrated": "supervisor",
-            "legal": "supervisor",
-            "lawsuit": "supervisor",
-        }
\ No newline at end of file
+        return self.ROUTING_RULES
\ No newline at end of file
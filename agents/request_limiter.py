@@ -0,0 +1,42 @@
+import asyncio
+from typing import Any, Dict, Optional, Tuple
+
+from vertexai.generative_models import GenerativeModel
+
+# Limiters shared by all agents with identical generation config
+_limiters: Dict[Tuple, "RequestLimiter"] = {}
+
+
+class RequestLimiter:
+    """
+    Caps concurrent generate_content calls for one model configuration.
+    
+    Every request is sent as soon as a slot is free and returns as soon as
+    its own call completes, with at most max_concurrency calls in flight
+    against Vertex AI at any time.
+    """
+    
+    def __init__(self, model: GenerativeModel, max_concurrency: int = 16):
+        self.model = model
+        self.max_concurrency = max_concurrency
+        
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+    
+    async def generate(self, contents: Any) -> Any:
+        """Call Vertex AI under the concurrency limit."""
+        # Semaphores belong to one event loop, so start afresh on a new one
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        async with self._semaphore:
+            return await self.model.generate_content_async(contents)
+
+
+def get_request_limiter(model: GenerativeModel, config_key: Tuple) -> RequestLimiter:
+    """Get the shared limiter for a model configuration."""
+    if config_key not in _limiters:
+        _limiters[config_key] = RequestLimiter(model)
+    return _limiters[config_key]
@@ -1,4 +1,5 @@
-from typing import List, Dict
+from types import MappingProxyType
+from typing import Mapping, Tuple
 from agents.base_agent import BaseAgent
 
 
@@ -8,15 +9,7 @@ class SalesSpecialistAgent(BaseAgent):
     Temperature: 0.7 for creative, persuasive responses.
     """
     
-    def __init__(self, **kwargs):
-        # Set default temperature for creative sales responses
-        kwargs.setdefault('temperature', 0.7)
-        kwargs.setdefault('agent_type', 'sales_specialist')
-        super().__init__(**kwargs)
-    
-    def _get_system_prompt(self) -> str:
-        """Get the system prompt for sales specialist agent."""
-        return """You are an experienced sales specialist with expertise in consultative selling and solution design.
+    SYSTEM_PROMPT = """You are an experienced sales specialist with expertise in consultative selling and solution design.
 Your role is to:
 
 1. Understand customer needs and business requirements
@@ -57,51 +50,67 @@ Sales Techniques:
 
 Remember: Build trust, demonstrate value, and help customers make informed decisions."""
     
-    def _get_escalation_keywords(self) -> List[str]:
+    # Keywords that might trigger escalation
+    ESCALATION_KEYWORDS = (
+        # Account manager escalation
+        "enterprise", "large company", "custom contract", "negotiate",
+        "bulk discount", "multi-year", "sla", "dedicated support",
+        # Solutions architect
+        "custom development", "api integration", "special requirements",
+        "modify product", "unique needs", "technical integration",
+        # Legal team
+        "contract terms", "legal", "liability", "compliance",
+        "data privacy", "gdpr", "terms of service",
+        # Back to support
+        "technical issue", "not working", "bug", "error",
+    )
+    
+    # Routing rules based on keywords
+    ROUTING_RULES = MappingProxyType({
+        # Account manager routing
+        "enterprise": "account_manager",
+        "large company": "account_manager",
+        "fortune 500": "account_manager",
+        "custom contract": "account_manager",
+        "bulk pricing": "account_manager",
+        "negotiate": "account_manager",
+        "multi-year deal": "account_manager",
+        
+        # Solutions architect routing
+        "custom development": "solutions_architect",
+        "api integration": "solutions_architect",
+        "special requirements": "solutions_architect",
+        "modify product": "solutions_architect",
+        "technical integration": "technical_sales_engineer",
+        
+        # Legal routing
+        "contract terms": "legal_team",
+        "legal question": "legal_team",
+        "liability": "legal_team",
+        "compliance": "legal_team",
+        "data privacy": "legal_team",
+        
+        # Back to support
+        "technical issue": "technical_support",
+        "not working": "technical_support",
+        "bug": "technical_support",
+        "implementation help": "technical_support",
+    })
+    
+    def __init__(self, **kwargs):
+        # Set default temperature for creative sales responses
+        kwargs.setdefault('temperature', 0.7)
+        kwargs.setdefault('agent_type', 'sales_specialist')
+        super().__init__(**kwargs)
+    
+    def _get_system_prompt(self) -> str:
+        """Get the system prompt for sales specialist agent."""
+        return self.SYSTEM_PROMPT
+    
+    def _get_escalation_keywords(self) -> Tuple[str, ...]:
         """Keywords that might trigger escalation."""
-        return [
-            # Account manager escalation
-            "enterprise", "large company", "custom contract", "negotiate",
-            "bulk discount", "multi-year", "sla", "dedicated support",
-            # Solutions architect
-            "custom development", "api integration", "special requirements",
-            "modify product", "unique needs", "technical integration",
-            # Legal team
-            "contract terms", "legal", "liability", "compliance",
-            "data privacy", "gdpr", "terms of service",
-            # Back to support
-            "technical issue", "not working", "bug", "error"
-        ]
+        return self.ESCALATION_KEYWORDS
     
-    def _get_routing_rules(self) -> Dict[str, str]:
+    def _get_routing_rules(self) -> Mapping[str, str]:
         """Define routing rules based on keywords."""
-        return {
-            # Account manager routing
-            "enterprise": "account_manager",
-            "large company": "account_manager",
-            "fortune 500": "account_manager",
-            "custom contract": "account_manager",
-            "bulk pricing": "account_manager",
-            "negotiate": "account_manager",
-            "multi-year deal": "account_manager",
-            
-            # Solutions architect routing
-            "custom development": "solutions_architect",
-            "api integration": "solutions_architect",
-            "special requirements": "solutions_architect",
-            "modify product": "solutions_architect",
-            "technical integration": "technical_sales_engineer",
-            
-            # Legal routing
-            "contract terms": "legal_team",
-            "legal question": "legal_team",
-            "liability": "legal_team",
-            "compliance": "legal_team",
-            "data privacy": "legal_team",
-            
-            # Back to support
-            "technical issue": "technical_support",
-            "not working": "technical_support",
-            "bug": "technical_support",
-            "implementation help": "technical_support",
-        }
\ No newline at end of file
+        return self.ROUTING_RULES
\ No newline at end of file
@@ -0,0 +1,152 @@
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from vertexai.language_models import TextEmbeddingModel
+
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Embedding model shared by every cache and agent in the process
+_embedding_models: Dict[str, TextEmbeddingModel] = {}
+
+
+async def _get_embedding_model(model_name: str) -> TextEmbeddingModel:
+    """Get the process-wide embedding model instance."""
+    model = _embedding_models.get(model_name)
+    if model is None:
+        # Loading is blocking I/O, so keep it off the event loop
+        model = await asyncio.to_thread(TextEmbeddingModel.from_pretrained, model_name)
+        model = _embedding_models.setdefault(model_name, model)
+    return model
+
+
+class _AgentTypeEntries:
+    """Cached embeddings and responses for a single agent type."""
+    
+    def __init__(self, dimensions: int):
+        self.vectors = np.empty((0, dimensions), dtype=np.float32)
+        self.history_hashes: List[int] = []
+        self.responses: List[str] = []
+        self.expires_at: List[float] = []
+
+
+class SemanticResponseCache:
+    """
+    Embedding-similarity response cache shared by all agents.
+    
+    Requests are matched by cosine similarity of normalized message embeddings,
+    so paraphrased repeats reuse an earlier response. Entries are partitioned
+    by agent type, only match identical conversation history and expire after
+    a TTL to bound staleness.
+    """
+    
+    def __init__(
+        self,
+        embedding_model_name: str = "text-embedding-004",
+        similarity_threshold: float = 0.92,
+        ttl_seconds: float = 3600.0,
+        max_entries_per_agent_type: int = 1024,
+    ):
+        self.embedding_model_name = embedding_model_name
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries_per_agent_type = max_entries_per_agent_type
+        self._entries: Dict[str, _AgentTypeEntries] = {}
+        
+        logger.info(
+            "semantic_cache_initialized",
+            model=embedding_model_name,
+            threshold=similarity_threshold,
+            ttl_seconds=ttl_seconds,
+        )
+    
+    async def embed(self, text: str) -> Optional[np.ndarray]:
+        """Compute the normalized embedding for a message."""
+        try:
+            model = await _get_embedding_model(self.embedding_model_name)
+            embeddings = await model.get_embeddings_async([text])
+        except Exception as e:
+            logger.error("semantic_cache_embedding_failed", error=str(e))
+            return None
+        
+        vector = np.asarray(embeddings[0].values, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+    
+    def lookup(
+        self, agent_type: str, history_hash: int, embedding: np.ndarray
+    ) -> Optional[str]:
+        """Return the cached response most similar to the embedding, if any."""
+        entries = self._entries.get(agent_type)
+        if entries is None or not entries.responses:
+            return None
+        
+        self._evict_expired(entries, time.monotonic())
+        if not entries.responses:
+            return None
+        
+        scores = entries.vectors @ embedding
+        best_index = None
+        best_score = self.similarity_threshold
+        
+        for index in np.flatnonzero(scores >= self.similarity_threshold):
+            if (
+                entries.history_hashes[index] == history_hash
+                and scores[index] >= best_score
+            ):
+                best_index = index
+                best_score = scores[index]
+        
+        if best_index is None:
+            return None
+        
+        return entries.responses[best_index]
+    
+    def store(
+        self,
+        agent_type: str,
+        history_hash: int,
+        embedding: np.ndarray,
+        response: str,
+    ):
+        """Add a generated response to the cache."""
+        entries = self._entries.get(agent_type)
+        if entries is None:
+            entries = _AgentTypeEntries(embedding.shape[0])
+            self._entries[agent_type] = entries
+        
+        now = time.monotonic()
+        self._evict_expired(entries, now)
+        
+        entries.vectors = np.vstack([entries.vectors, embedding[np.newaxis, :]])
+        entries.history_hashes.append(history_hash)
+        entries.responses.append(response)
+        entries.expires_at.append(now + self.ttl_seconds)
+        
+        # Drop the oldest entries once over capacity
+        overflow = len(entries.responses) - self.max_entries_per_agent_type
+        if overflow > 0:
+            self._drop_oldest(entries, overflow)
+    
+    def _evict_expired(self, entries: _AgentTypeEntries, now: float):
+        """Remove entries whose TTL has elapsed."""
+        # Entries are appended in insertion order, so expiry times are sorted
+        expired = 0
+        for expires_at in entries.expires_at:
+            if expires_at > now:
+                break
+            expired += 1
+        
+        if expired:
+            self._drop_oldest(entries, expired)
+    
+    @staticmethod
+    def _drop_oldest(entries: _AgentTypeEntries, count: int):
+        """Remove the given number of oldest entries."""
+        entries.vectors = entries.vectors[count:]
+        del entries.history_hashes[:count]
+        del entries.responses[:count]
+        del entries.expires_at[:count]
@@ -1,4 +1,5 @@
-from typing import List, Dict
+from types import MappingProxyType
+from typing import Mapping, Tuple
 from agents.base_agent import BaseAgent
 
 
@@ -8,15 +9,7 @@ class TechnicalSupportAgent(BaseAgent):
     Temperature: 0.2 for technical accuracy priority.
     """
     
-    def __init__(self, **kwargs):
-        # Set default temperature for technical accuracy
-        kwargs.setdefault('temperature', 0.2)
-        kwargs.setdefault('agent_type', 'technical_support')
-        super().__init__(**kwargs)
-    
-    def _get_system_prompt(self) -> str:
-        """Get the system prompt for technical support agent."""
-        return """You are an expert technical support specialist with deep knowledge of our products and systems.
+    SYSTEM_PROMPT = """You are an expert technical support specialist with deep knowledge of our products and systems.
 Your role is to:
 
 1. Diagnose technical issues systematically
@@ -49,41 +42,57 @@ Escalation Criteria:
 
 Remember: Be patient, thorough, and ensure the customer understands each step."""
     
-    def _get_escalation_keywords(self) -> List[str]:
+    # Keywords that might trigger escalation
+    ESCALATION_KEYWORDS = (
+        # Development team escalation
+        "system down", "outage", "all users affected", "critical bug",
+        "data corruption", "security breach", "vulnerability",
+        # Senior support escalation  
+        "still not working", "tried everything", "urgent", "production down",
+        "data loss", "cannot access", "completely broken",
+        # Back to customer service
+        "refund", "cancel", "pricing", "sales", "discount",
+    )
+    
+    # Routing rules based on keywords
+    ROUTING_RULES = MappingProxyType({
+        # Development team routing
+        "system down": "development_team",
+        "outage": "development_team",
+        "all users affected": "development_team",
+        "critical bug": "development_team",
+        "data corruption": "development_team",
+        "security breach": "security_team",
+        "vulnerability": "security_team",
+        
+        # Senior technical support
+        "still not working": "senior_technical_support",
+        "tried everything": "senior_technical_support",
+        "production down": "senior_technical_support",
+        "data loss": "senior_technical_support",
+        
+        # Back to other departments
+        "refund": "customer_service",
+        "cancel subscription": "customer_service",
+        "pricing": "sales_specialist",
+        "upgrade": "sales_specialist",
+        "different product": "sales_specialist",
+    })
+    
+    def __init__(self, **kwargs):
+        # Set default temperature for technical accuracy
+        kwargs.setdefault('temperature', 0.2)
+        kwargs.setdefault('agent_type', 'technical_support')
+        super().__init__(**kwargs)
+    
+    def _get_system_prompt(self) -> str:
+        """Get the system prompt for technical support agent."""
+        return self.SYSTEM_PROMPT
+    
+    def _get_escalation_keywords(self) -> Tuple[str, ...]:
         """Keywords that might trigger escalation."""
-        return [
-            # Development team escalation
-            "system down", "outage", "all users affected", "critical bug",
-            "data corruption", "security breach", "vulnerability",
-            # Senior support escalation  
-            "still not working", "tried everything", "urgent", "production down",
-            "data loss", "cannot access", "completely broken",
-            # Back to customer service
-            "refund", "cancel", "pricing", "sales", "discount"
-        ]
+        return self.ESCALATION_KEYWORDS
     
-    def _get_routing_rules(self) -> Dict[str, str]:
+    def _get_routing_rules(self) -> Mapping[str, str]:
         """Define routing rules based on keywords."""
-        return {
-            # Development team routing
-            "system down": "development_team",
-            "outage": "development_team",
-            "all users affected": "development_team",
-            "critical bug": "development_team",
-            "data corruption": "development_team",
-            "security breach": "security_team",
-            "vulnerability": "security_team",
-            
-            # Senior technical support
-            "still not working": "senior_technical_support",
-            "tried everything": "senior_technical_support",
-            "production down": "senior_technical_support",
-            "data loss": "senior_technical_support",
-            
-            # Back to other departments
-            "refund": "customer_service",
-            "cancel subscription": "customer_service",
-            "pricing": "sales_specialist",
-            "upgrade": "sales_specialist",
-            "different product": "sales_specialist",
-        }
\ No newline at end of file
+        return self.ROUTING_RULES
\ No newline at end of file
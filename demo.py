@@ -7,21 +7,55 @@ Demonstrates various conversation scenarios and agent interactions
 import asyncio
 import httpx
 import json
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from datetime import datetime
 import random
 
 API_BASE_URL = "http://localhost:8000/api/v1"
 
+# Pooled client shared by every demo run in the process
+_client: Optional[httpx.AsyncClient] = None
+_client_lock = asyncio.Lock()
+
+
+async def get_client() -> httpx.AsyncClient:
+    """Get the shared HTTP client, creating it on first use"""
+    global _client
+    
+    async with _client_lock:
+        if _client is None or _client.is_closed:
+            _client = httpx.AsyncClient(
+                base_url=API_BASE_URL,
+                http2=True,
+                timeout=httpx.Timeout(30.0, connect=5.0),
+                limits=httpx.Limits(
+                    max_connections=100,
+                    max_keepalive_connections=20,
+                    keepalive_expiry=30.0,
+                ),
+            )
+        return _client
+
+
+async def shutdown():
+    """Close the shared HTTP client"""
+    global _client
+    
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
 
 class DemoScenario:
     """Base class for demo scenarios"""
     
-    def __init__(self, name: str, description: str):
+    def __init__(self, name: str, description: str, thinking_delay: float = 0.0):
         self.name = name
         self.description = description
+        self.thinking_delay = thinking_delay
         self.session_id = None
         self.messages = []
+        self.agent_types = set()
     
     async def run(self, client: httpx.AsyncClient):
         """Run the demo scenario"""
@@ -30,10 +64,7 @@ class DemoScenario:
         print(f"Description: {self.description}")
         print('='*60)
         
-        # Create session
-        await self.create_session(client)
-        
-        # Run conversation
+        # Run conversation; the first message also creates the session
         await self.conversation(client)
         
         # End session
@@ -42,26 +73,39 @@ class DemoScenario:
         # Show analytics
         await self.show_analytics(client)
     
-    async def create_session(self, client: httpx.AsyncClient):
-        """Create a new session"""
+    async def create_session(self, client: httpx.AsyncClient, message: str) -> Dict[str, Any]:
+        """Create a new session and send its first message in one request"""
         response = await client.post(
-            f"{API_BASE_URL}/sessions",
-            json={"customer_id": f"demo_{random.randint(1000, 9999)}"}
+            "/sessions:create_and_send",
+            json={
+                "customer_id": f"demo_{random.randint(1000, 9999)}",
+                "content": message,
+            }
         )
         data = response.json()
-        self.session_id = data["session_id"]
+        self.session_id = data["session"]["session_id"]
         print(f"\n✅ Session created: {self.session_id}")
-        print(f"   Agent: {data['agent_type']}")
+        print(f"   Agent: {data['session']['agent_type']}")
+        
+        return data["reply"]
     
     async def send_message(self, client: httpx.AsyncClient, message: str):
         """Send a message and display response"""
         print(f"\n👤 Customer: {message}")
         
-        response = await client.post(
-            f"{API_BASE_URL}/sessions/{self.session_id}/messages",
-            json={"content": message}
-        )
-        data = response.json()
+        if self.session_id is None:
+            data = await self.create_session(client, message)
+        else:
+            response = await client.post(
+                f"/sessions/{self.session_id}/messages",
+                json={"content": message}
+            )
+            data = response.json()
+        
+        # Simulate thinking time while the response is displayed
+        thinking = None
+        if self.thinking_delay:
+            thinking = asyncio.create_task(asyncio.sleep(self.thinking_delay))
         
         print(f"🤖 {data['agent_type']}: {data['content']}")
         
@@ -73,16 +117,17 @@ class DemoScenario:
             "agent": data["content"],
             "agent_type": data["agent_type"]
         })
+        self.agent_types.add(data["agent_type"])
         
-        # Simulate thinking time
-        await asyncio.sleep(1)
+        if thinking is not None:
+            await thinking
         
         return data
     
     async def end_session(self, client: httpx.AsyncClient, satisfaction: float = 8.0):
         """End the session with satisfaction score"""
         response = await client.post(
-            f"{API_BASE_URL}/sessions/{self.session_id}/end",
+            f"/sessions/{self.session_id}/end",
             json={
                 "satisfaction_score": satisfaction,
                 "resolution_status": "resolved"
@@ -92,13 +137,13 @@ class DemoScenario:
     
     async def show_analytics(self, client: httpx.AsyncClient):
         """Show session analytics"""
-        response = await client.get(f"{API_BASE_URL}/sessions/{self.session_id}")
+        response = await client.get(f"/sessions/{self.session_id}")
         data = response.json()
         
         print(f"\n📊 Session Analytics:")
         print(f"   Total messages: {data['total_messages']}")
         print(f"   Escalations: {data['escalation_count']}")
-        print(f"   Agents involved: {len(set(m['agent_type'] for m in self.messages))}")
+        print(f"   Agents involved: {len(self.agent_types)}")
         print(f"   Tags: {', '.join(data['tags'])}")
     
     async def conversation(self, client: httpx.AsyncClient):
@@ -154,7 +199,7 @@ class FrustratedCustomerScenario(DemoScenario):
         await self.send_message(client, "I've been having issues for weeks now")
         await self.send_message(client, "I want to speak to a manager immediately")
         await self.send_message(client, "I'm considering switching to your competitor")
-        
+    
     async def end_session(self, client: httpx.AsyncClient, satisfaction: float = 4.0):
         """Override with lower satisfaction"""
         await super().end_session(client, satisfaction)
@@ -180,8 +225,12 @@ class MixedInquiryScenario(DemoScenario):
 
 async def show_system_metrics(client: httpx.AsyncClient):
     """Display system metrics"""
-    response = await client.get(f"{API_BASE_URL}/system/metrics")
-    metrics = response.json()
+    metrics_response, health_response = await asyncio.gather(
+        client.get("/system/metrics"),
+        client.get("/system/health"),
+    )
+    metrics = metrics_response.json()
+    health = health_response.json()
     
     print(f"\n{'='*60}")
     print("System Metrics")
@@ -190,6 +239,7 @@ async def show_system_metrics(client: httpx.AsyncClient):
     print(f"Active sessions: {metrics['active_sessions']}")
     print(f"Completed sessions: {metrics['completed_sessions']}")
     print(f"Total escalations: {metrics['total_escalations']}")
+    print(f"System health: {health['status']}")
     print(f"\nAgent Workload:")
     
     for agent_id, workload in metrics['agent_workload'].items():
@@ -208,32 +258,45 @@ async def run_demo():
         MixedInquiryScenario(),
     ]
     
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        # Check system health
-        try:
-            response = await client.get(f"{API_BASE_URL}/system/health")
-            if response.json()["status"] != "healthy":
-                print("❌ System is not healthy. Please check the services.")
-                return
-        except Exception as e:
-            print(f"❌ Cannot connect to API: {e}")
-            print("Make sure the service is running (docker-compose up)")
+    client = await get_client()
+    
+    # Check system health
+    try:
+        response = await client.get("/system/health")
+        if response.json()["status"] != "healthy":
+            print("❌ System is not healthy. Please check the services.")
             return
-        
-        print("✅ System is healthy and ready")
-        
-        # Run scenarios
-        for scenario in scenarios:
-            await scenario.run(client)
-            await asyncio.sleep(2)  # Pause between scenarios
-        
-        # Show final metrics
-        await show_system_metrics(client)
+    except Exception as e:
+        print(f"❌ Cannot connect to API: {e}")
+        print("Make sure the service is running (docker-compose up)")
+        return
+    
+    print("✅ System is healthy and ready")
+    
+    # Run scenarios concurrently over the shared client
+    await asyncio.gather(*(scenario.run(client) for scenario in scenarios))
+    
+    # Show final metrics
+    await show_system_metrics(client)
     
     print(f"\n{'='*60}")
     print("Demo completed successfully!")
     print("Check Grafana dashboards at http://localhost:3000 for visualizations")
 
 
+async def main():
+    """Run the demo and release the shared client"""
+    try:
+        await run_demo()
+    finally:
+        await shutdown()
+
+
 if __name__ == "__main__":
-    asyncio.run(run_demo())
\ No newline at end of file
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:  # uvloop is not available on Windows
+        pass
+    
+    asyncio.run(main())
\ No newline at end of file
@@ -1,18 +1,27 @@
 import os
 import asyncio
+import itertools
+import time
 from contextlib import asynccontextmanager
+from datetime import datetime
 from typing import Optional, Dict, Any
 import uuid
 
 from fastapi import FastAPI, HTTPException, Depends, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field
+import orjson
 import redis.asyncio as redis
 import structlog
 
-from agents import CustomerServiceAgent, TechnicalSupportAgent, SalesSpecialistAgent
-from services import StateManager, SessionManager
+from agents import (
+    CustomerServiceAgent,
+    TechnicalSupportAgent,
+    SalesSpecialistAgent,
+    SemanticResponseCache,
+)
+from services import StateManager, SessionManager, SessionEndedError
 from models import Session, SessionStatus
 from utils import setup_logging, get_logger, add_correlation_id
 
@@ -52,6 +61,15 @@ class SendMessageResponse(BaseModel):
     escalated: bool = False
 
 
+class CreateSessionAndSendRequest(CreateSessionRequest):
+    content: str = Field(min_length=1, max_length=2000)
+
+
+class CreateSessionAndSendResponse(BaseModel):
+    session: CreateSessionResponse
+    reply: SendMessageResponse
+
+
 class EndSessionRequest(BaseModel):
     satisfaction_score: Optional[float] = Field(None, ge=0, le=10)
     resolution_status: SessionStatus = SessionStatus.RESOLVED
@@ -60,8 +78,8 @@ class EndSessionRequest(BaseModel):
 class SessionDetailsResponse(BaseModel):
     session_id: str
     status: str
-    created_at: str
-    ended_at: Optional[str]
+    created_at: datetime
+    ended_at: Optional[datetime]
     current_agent_type: Optional[str]
     total_messages: int
     escalation_count: int
@@ -86,12 +104,37 @@ class SystemMetricsResponse(BaseModel):
     timestamp: str
 
 
+# Details of ended sessions no longer change, so they are cached serialized
+SESSION_DETAILS_CACHE_TTL = 3600
+
 # Global instances
 state_manager: Optional[StateManager] = None
 session_manager: Optional[SessionManager] = None
 redis_client: Optional[redis.Redis] = None
 
 
+async def connect_redis() -> Optional[redis.Redis]:
+    """Connect to Redis if configured, returning None when unavailable."""
+    if not os.getenv("REDIS_HOST"):
+        return None
+    
+    try:
+        client = redis.Redis(
+            host=os.getenv("REDIS_HOST", "localhost"),
+            port=int(os.getenv("REDIS_PORT", 6379)),
+            db=int(os.getenv("REDIS_DB", 0)),
+            password=os.getenv("REDIS_PASSWORD"),
+            # Payloads are JSON bytes parsed directly by pydantic-core/orjson
+            decode_responses=False,
+        )
+        await client.ping()
+        logger.info("redis_connected")
+        return client
+    except Exception as e:
+        logger.error("redis_connection_failed", error=str(e))
+        return None
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager."""
@@ -99,21 +142,28 @@ async def lifespan(app: FastAPI):
     
     logger.info("application_starting")
     
-    # Initialize Redis
-    if os.getenv("REDIS_HOST"):
-        try:
-            redis_client = redis.Redis(
-                host=os.getenv("REDIS_HOST", "localhost"),
-                port=int(os.getenv("REDIS_PORT", 6379)),
-                db=int(os.getenv("REDIS_DB", 0)),
-                password=os.getenv("REDIS_PASSWORD"),
-                decode_responses=True,
-            )
-            await redis_client.ping()
-            logger.info("redis_connected")
-        except Exception as e:
-            logger.error("redis_connection_failed", error=str(e))
-            redis_client = None
+    # Shared semantic response cache (opt-in)
+    semantic_cache = None
+    if os.getenv("ENABLE_SEMANTIC_CACHE", "false").lower() == "true":
+        semantic_cache = SemanticResponseCache(
+            similarity_threshold=float(
+                os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.92)
+            ),
+            ttl_seconds=float(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", 3600)),
+        )
+    
+    # Connect to Redis while the agents initialize Vertex AI in worker threads
+    agent_config = {
+        "project_id": os.getenv("GOOGLE_CLOUD_PROJECT"),
+        "location": os.getenv("VERTEX_AI_LOCATION", "us-central1"),
+        "semantic_cache": semantic_cache,
+    }
+    redis_client, *agents = await asyncio.gather(
+        connect_redis(),
+        asyncio.to_thread(CustomerServiceAgent, agent_id="cs-agent-1", **agent_config),
+        asyncio.to_thread(TechnicalSupportAgent, agent_id="tech-agent-1", **agent_config),
+        asyncio.to_thread(SalesSpecialistAgent, agent_id="sales-agent-1", **agent_config),
+    )
     
     # Initialize state manager
     state_manager = StateManager(redis_client=redis_client)
@@ -123,45 +173,34 @@ async def lifespan(app: FastAPI):
     session_manager = SessionManager(
         state_manager=state_manager,
         redis_client=redis_client,
-        session_timeout_minutes=int(os.getenv("SESSION_TIMEOUT_MINUTES", 30))
+        session_timeout_minutes=int(os.getenv("SESSION_TIMEOUT_MINUTES", 30)),
+        serializer=os.getenv("REDIS_SERIALIZER", "msgpack"),
+        context_cache_size=int(os.getenv("CONTEXT_CACHE_SIZE", 10000)),
+        context_idle_seconds=float(os.getenv("CONTEXT_IDLE_SECONDS", 3600)),
     )
+    await session_manager.start()
     
-    # Initialize and register agents
-    agents = [
-        CustomerServiceAgent(
-            agent_id="cs-agent-1",
-            project_id=os.getenv("GOOGLE_CLOUD_PROJECT"),
-            location=os.getenv("VERTEX_AI_LOCATION", "us-central1"),
-        ),
-        TechnicalSupportAgent(
-            agent_id="tech-agent-1",
-            project_id=os.getenv("GOOGLE_CLOUD_PROJECT"),
-            location=os.getenv("VERTEX_AI_LOCATION", "us-central1"),
-        ),
-        SalesSpecialistAgent(
-            agent_id="sales-agent-1",
-            project_id=os.getenv("GOOGLE_CLOUD_PROJECT"),
-            location=os.getenv("VERTEX_AI_LOCATION", "us-central1"),
-        ),
-    ]
-    
+    # Register agents
     for agent in agents:
         state_manager.register_agent(agent)
     
     logger.info("agents_initialized", agent_count=len(agents))
     
-    yield
-    
-    # Shutdown
-    logger.info("application_stopping")
-    
-    # Stop state manager
-    if state_manager:
-        await state_manager.stop()
-    
-    # Close Redis
-    if redis_client:
-        await redis_client.close()
+    try:
+        yield
+    finally:
+        # Shutdown
+        logger.info("application_stopping")
+        
+        # Stop background tasks
+        if session_manager:
+            await session_manager.stop()
+        if state_manager:
+            await state_manager.stop()
+        
+        # Close Redis and drain its connection pool
+        if redis_client:
+            await redis_client.aclose(close_connection_pool=True)
 
 
 # Create FastAPI app
@@ -170,6 +209,7 @@ app = FastAPI(
     description="Production-ready multi-agent customer service system with Vertex AI",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Add CORS middleware
@@ -182,10 +222,23 @@ app.add_middleware(
 )
 
 
+# Time-ordered correlation IDs: nanosecond clock, per-process tag, sequence
+_correlation_process_tag = os.urandom(2).hex()
+_correlation_sequence = itertools.count().__next__
+
+
+def new_correlation_id() -> str:
+    """Generate a correlation ID that sorts by creation time."""
+    return (
+        f"{time.time_ns():x}{_correlation_process_tag}"
+        f"{_correlation_sequence() & 0xFFFF:04x}"
+    )
+
+
 # Middleware for correlation IDs
 @app.middleware("http")
 async def correlation_id_middleware(request, call_next):
-    correlation_id = request.headers.get("X-Correlation-ID") or str(uuid.uuid4())
+    correlation_id = request.headers.get("X-Correlation-ID") or new_correlation_id()
     add_correlation_id(correlation_id)
     
     response = await call_next(request)
@@ -194,6 +247,33 @@ async def correlation_id_middleware(request, call_next):
     return response
 
 
+async def _get_cached_session_details(session_id: str) -> Optional[bytes]:
+    """Get the serialized details of an ended session from Redis."""
+    if not redis_client:
+        return None
+    
+    try:
+        return await redis_client.get(f"session:detail:{session_id}")
+    except Exception as e:
+        logger.error("session_details_cache_get_error", session_id=session_id, error=str(e))
+        return None
+
+
+async def _cache_session_details(details: SessionDetailsResponse):
+    """Store the serialized details of an ended session in Redis."""
+    if not redis_client:
+        return
+    
+    try:
+        await redis_client.setex(
+            f"session:detail:{details.session_id}",
+            SESSION_DETAILS_CACHE_TTL,
+            orjson.dumps(details.model_dump()),
+        )
+    except Exception as e:
+        logger.error("session_details_cache_set_error", session_id=details.session_id, error=str(e))
+
+
 # API Endpoints
 @app.post(
     "/api/v1/sessions",
@@ -225,6 +305,73 @@ async def create_session(request: CreateSessionRequest):
         )
 
 
+async def _close_failed_session(session_id: str):
+    """End a session whose first message could not be processed."""
+    try:
+        await session_manager.end_session(
+            session_id=session_id, resolution_status=SessionStatus.CLOSED
+        )
+    except Exception as e:
+        logger.error("close_failed_session_error", session_id=session_id, error=str(e))
+
+
+@app.post(
+    "/api/v1/sessions:create_and_send",
+    response_model=CreateSessionAndSendResponse,
+    status_code=status.HTTP_201_CREATED,
+    tags=["sessions"]
+)
+async def create_session_and_send(request: CreateSessionAndSendRequest):
+    """Create a session and send its first message in a single round trip."""
+    try:
+        session, agent = await session_manager.create_session(
+            customer_id=request.customer_id,
+            initial_agent_type=request.initial_agent_type,
+            metadata=request.metadata,
+        )
+        
+        try:
+            response_message, session = await session_manager.process_message(
+                session_id=session.id,
+                message_content=request.content,
+            )
+        except ValueError as e:
+            # Close the new session rather than leave it orphaned
+            await _close_failed_session(session.id)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail={"session_id": session.id, "error": str(e)},
+            )
+        except Exception:
+            await _close_failed_session(session.id)
+            raise
+        
+        return CreateSessionAndSendResponse(
+            session=CreateSessionResponse(
+                session_id=session.id,
+                status=session.status,
+                agent_type=agent.agent_type if agent else None,
+                message="Session created successfully" if agent else "Session created, waiting for available agent"
+            ),
+            reply=SendMessageResponse(
+                message_id=response_message.id,
+                content=response_message.content,
+                agent_type=response_message.agent_type or "unknown",
+                timestamp=response_message.iso_timestamp,
+                escalated=len(session.escalation_history) > 0,
+            ),
+        )
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("create_and_send_error", error=str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to create session and process message"
+        )
+
+
 @app.post(
     "/api/v1/sessions/{session_id}/messages",
     response_model=SendMessageResponse,
@@ -245,10 +392,15 @@ async def send_message(session_id: str, request: SendMessageRequest):
             message_id=response_message.id,
             content=response_message.content,
             agent_type=response_message.agent_type or "unknown",
-            timestamp=response_message.timestamp.isoformat(),
+            timestamp=response_message.iso_timestamp,
             escalated=escalated,
         )
     
+    except SessionEndedError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -270,6 +422,13 @@ async def send_message(session_id: str, request: SendMessageRequest):
 async def get_session_details(session_id: str):
     """Get details and analytics for a session."""
     try:
+        # Ended sessions are served straight from their cached payload; live
+        # sessions are in memory and change with every message
+        if session_id not in state_manager.active_sessions:
+            cached_details = await _get_cached_session_details(session_id)
+            if cached_details:
+                return Response(content=cached_details, media_type="application/json")
+        
         session = await session_manager.get_session(session_id)
         if not session:
             raise HTTPException(
@@ -280,8 +439,8 @@ async def get_session_details(session_id: str):
         return SessionDetailsResponse(
             session_id=session.id,
             status=session.status,
-            created_at=session.created_at.isoformat(),
-            ended_at=session.ended_at.isoformat() if session.ended_at else None,
+            created_at=session.created_at,
+            ended_at=session.ended_at,
             current_agent_type=session.current_agent_type,
             total_messages=session.metrics.total_messages,
             escalation_count=session.metrics.escalation_count,
@@ -313,17 +472,21 @@ async def end_session(session_id: str, request: EndSessionRequest):
             resolution_status=request.resolution_status,
         )
         
-        return SessionDetailsResponse(
+        details = SessionDetailsResponse(
             session_id=session.id,
             status=session.status,
-            created_at=session.created_at.isoformat(),
-            ended_at=session.ended_at.isoformat() if session.ended_at else None,
+            created_at=session.created_at,
+            ended_at=session.ended_at,
             current_agent_type=session.current_agent_type,
             total_messages=session.metrics.total_messages,
             escalation_count=session.metrics.escalation_count,
             satisfaction_score=session.metrics.satisfaction_score,
             tags=session.tags,
         )
+        
+        await _cache_session_details(details)
+        
+        return details
     
     except ValueError as e:
         raise HTTPException(
@@ -342,9 +505,28 @@ async def end_session(session_id: str, request: EndSessionRequest):
     "/api/v1/sessions/{session_id}/transcript",
     tags=["sessions"]
 )
-async def get_session_transcript(session_id: str):
-    """Get the full transcript of a session."""
+async def get_session_transcript(session_id: str, stream: bool = False):
+    """
+    Get the full transcript of a session.
+    
+    With stream=true the transcript is sent as plain text, one line per
+    message, without building the whole transcript in memory first.
+    """
     try:
+        if stream:
+            lines = await session_manager.get_session_transcript_lines(session_id)
+            if lines is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Session transcript not found"
+                )
+            
+            async def stream_lines():
+                for line in lines:
+                    yield f"{line}\n"
+            
+            return StreamingResponse(stream_lines(), media_type="text/plain")
+        
         transcript = await session_manager.get_session_transcript(session_id)
         if not transcript:
             raise HTTPException(
@@ -352,7 +534,11 @@ async def get_session_transcript(session_id: str):
                 detail="Session transcript not found"
             )
         
-        return {"session_id": session_id, "transcript": transcript}
+        # Encode once here rather than through FastAPI's response encoding
+        return Response(
+            content=orjson.dumps({"session_id": session_id, "transcript": transcript}),
+            media_type="application/json",
+        )
     
     except HTTPException:
         raise
@@ -448,10 +634,18 @@ if os.getenv("ENABLE_DEMO_MODE", "false").lower() == "true":
 if __name__ == "__main__":
     import uvicorn
     
+    try:
+        import uvloop
+        loop = "uvloop"
+    except ImportError:  # uvloop is not available on Windows
+        loop = "auto"
+    
     uvicorn.run(
         "main:app",
         host=os.getenv("API_HOST", "0.0.0.0"),
         port=int(os.getenv("API_PORT", 8000)),
+        loop=loop,
+        http="httptools",
         reload=os.getenv("DEBUG", "false").lower() == "true",
         log_config=None,  # Use our custom logging
     )
\ No newline at end of file
@@ -1,8 +1,10 @@
+from collections import deque
 from datetime import datetime
 from enum import Enum
-from typing import Optional, Dict, Any, List
-from pydantic import BaseModel, Field, field_validator
-import uuid
+from functools import cached_property
+from typing import Optional, Dict, Any, Callable, Deque, Iterator, List, Tuple
+from pydantic import BaseModel, Field, PrivateAttr
+from uuid import uuid4
 
 
 class MessageRole(str, Enum):
@@ -12,10 +14,17 @@ class MessageRole(str, Enum):
     SYSTEM = "system"
 
 
+# Role member bound once for identity checks on the message path
+_USER = MessageRole.USER
+
+# Transcript role labels such as "Assistant (technical_support)"
+_role_labels: Dict[Tuple[MessageRole, Optional[str]], str] = {}
+
+
 class Message(BaseModel):
     """Model for individual messages in a conversation."""
     
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=lambda: uuid4().hex)
     role: MessageRole
     content: str
     timestamp: datetime = Field(default_factory=datetime.utcnow)
@@ -23,16 +32,27 @@ class Message(BaseModel):
     agent_type: Optional[str] = None
     metadata: Dict[str, Any] = Field(default_factory=dict)
     
-    @field_validator('content')
-    def content_not_empty(cls, v):
-        if not v or not v.strip():
+    @classmethod
+    def create(cls, role: MessageRole, content: str, **fields: Any) -> "Message":
+        """
+        Create a message from untrusted content.
+        
+        Content is checked here, once at ingress, rather than in a validator
+        that would re-run every time a conversation is loaded from Redis.
+        """
+        if not content or not content.strip():
             raise ValueError('Message content cannot be empty')
-        return v
+        return cls(role=role, content=content, **fields)
+    
+    @cached_property
+    def content_lower(self) -> str:
+        """Lowercased message content, computed once per message."""
+        return self.content.lower()
     
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
+    @cached_property
+    def iso_timestamp(self) -> str:
+        """ISO-formatted timestamp, computed once per message."""
+        return self.timestamp.isoformat()
 
 
 class ConversationContext(BaseModel):
@@ -45,10 +65,63 @@ class ConversationContext(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     
+    # Rolling window of the most recent messages; the full list is kept for
+    # transcripts and metrics
+    _recent_messages: Deque[Message] = PrivateAttr(
+        default_factory=lambda: deque(maxlen=10)
+    )
+    
+    # Recent messages already rendered for the model, as (message_id, rendered)
+    _rendered_history: Deque[Tuple[str, Any]] = PrivateAttr(
+        default_factory=lambda: deque(maxlen=10)
+    )
+    _rendered_count: int = PrivateAttr(default=0)
+    
+    # Index of the most recent user message, or -1 if there is none
+    _last_user_index: int = PrivateAttr(default=-1)
+    
+    # Formatted transcript lines for messages[:len(_transcript_lines)]
+    _transcript_lines: List[str] = PrivateAttr(default_factory=list)
+    
+    def model_post_init(self, __context: Any):
+        """Seed the recent message window and user index from restored messages."""
+        self._recent_messages.extend(self.messages)
+        for index in range(len(self.messages) - 1, -1, -1):
+            if self.messages[index].role is _USER:
+                self._last_user_index = index
+                break
+    
     def add_message(self, message: Message):
         """Add a message to the conversation."""
+        if message.role is _USER:
+            self._last_user_index = len(self.messages)
         self.messages.append(message)
-        self.updated_at = datetime.utcnow()
+        self._recent_messages.append(message)
+        self.updated_at = message.timestamp
+    
+    def get_recent_messages(self) -> Deque[Message]:
+        """Get the last 10 messages without copying the message list."""
+        return self._recent_messages
+    
+    def get_rendered_history(
+        self, render: Callable[[Message], Any]
+    ) -> Deque[Tuple[str, Any]]:
+        """
+        Get the last 10 messages rendered for the model.
+        
+        Only messages added since the previous call are rendered, so each
+        message is converted once per conversation rather than once per turn.
+        """
+        new_count = min(
+            len(self.messages) - self._rendered_count, len(self._recent_messages)
+        )
+        recent = self._recent_messages
+        for index in range(len(recent) - new_count, len(recent)):
+            message = recent[index]
+            self._rendered_history.append((message.id, render(message)))
+        self._rendered_count = len(self.messages)
+        
+        return self._rendered_history
     
     def get_message_count(self) -> int:
         """Get total number of messages."""
@@ -56,10 +129,9 @@ class ConversationContext(BaseModel):
     
     def get_last_user_message(self) -> Optional[Message]:
         """Get the last message from the user."""
-        for message in reversed(self.messages):
-            if message.role == MessageRole.USER:
-                return message
-        return None
+        if self._last_user_index < 0:
+            return None
+        return self.messages[self._last_user_index]
     
     def get_conversation_duration(self) -> float:
         """Get conversation duration in seconds."""
@@ -70,17 +142,30 @@ class ConversationContext(BaseModel):
         last_message = self.messages[-1]
         return (last_message.timestamp - first_message.timestamp).total_seconds()
     
-    def to_transcript(self) -> str:
-        """Convert conversation to readable transcript."""
-        transcript_lines = []
+    def iter_transcript_lines(self) -> Iterator[str]:
+        """
+        Yield readable transcript lines, one per message.
         
-        for msg in self.messages:
-            role = msg.role.value.capitalize()
-            if msg.agent_type:
-                role = f"{role} ({msg.agent_type})"
-            
-            transcript_lines.append(
-                f"[{msg.timestamp.strftime('%Y-%m-%d %H:%M:%S')}] {role}: {msg.content}"
-            )
+        Lines are formatted once per message and kept on the context, so
+        repeated calls only format messages added since the previous call.
+        """
+        transcript_lines = self._transcript_lines
         
-        return "\n".join(transcript_lines)
\ No newline at end of file
+        for index, msg in enumerate(self.messages):
+            if index == len(transcript_lines):
+                role_key = (msg.role, msg.agent_type)
+                role = _role_labels.get(role_key)
+                if role is None:
+                    role = msg.role.value.capitalize()
+                    if msg.agent_type:
+                        role = f"{role} ({msg.agent_type})"
+                    _role_labels[role_key] = role
+                
+                timestamp = msg.timestamp.isoformat(sep=" ", timespec="seconds")
+                transcript_lines.append(f"[{timestamp}] {role}: {msg.content}")
+            
+            yield transcript_lines[index]
+    
+    def to_transcript(self) -> str:
+        """Convert conversation to readable transcript."""
+        return "\n".join(self.iter_transcript_lines())
\ No newline at end of file
@@ -1,9 +1,11 @@
 from datetime import datetime
 from enum import Enum
-from typing import Optional, Dict, Any, List
-from pydantic import BaseModel, Field
+from typing import Optional, Dict, Any, List, Set, Tuple
+from pydantic import BaseModel, Field, PrivateAttr
 import uuid
 
+from models.message import ConversationContext, Message, MessageRole
+
 
 class SessionStatus(str, Enum):
     """Enum for session statuses."""
@@ -28,21 +30,47 @@ class SessionMetrics(BaseModel):
     satisfaction_score: Optional[float] = None
     agents_involved: List[str] = Field(default_factory=list)
     
-    def update_from_context(self, context: "ConversationContext"):
-        """Update metrics from conversation context."""
-        from models.message import MessageRole
+    # Set view of agents_involved for O(1) membership checks
+    _agents_set: Set[str] = PrivateAttr(default_factory=set)
+    
+    def model_post_init(self, __context: Any):
+        """Seed the agent set from restored metrics."""
+        self._agents_set.update(self.agents_involved)
+    
+    def on_message_added(self, message: Message):
+        """Update message counts and agents for a newly added message."""
+        self.total_messages += 1
+        if message.role is MessageRole.USER:
+            self.user_messages += 1
+        elif message.role is MessageRole.ASSISTANT:
+            self.agent_messages += 1
+        
+        agent_type = message.agent_type
+        if agent_type and agent_type not in self._agents_set:
+            self._agents_set.add(agent_type)
+            self.agents_involved.append(agent_type)
+    
+    def update_from_context(self, context: ConversationContext):
+        """
+        Recompute metrics from a full conversation context.
+        
+        Only needed when rebuilding metrics; live sessions are kept current
+        through on_message_added.
+        """
+        user, assistant = MessageRole.USER, MessageRole.ASSISTANT
         
         self.total_messages = len(context.messages)
         self.user_messages = sum(
-            1 for msg in context.messages if msg.role == MessageRole.USER
+            1 for msg in context.messages if msg.role is user
         )
         self.agent_messages = sum(
-            1 for msg in context.messages if msg.role == MessageRole.ASSISTANT
+            1 for msg in context.messages if msg.role is assistant
         )
         
         # Track unique agents
         for msg in context.messages:
-            if msg.agent_type and msg.agent_type not in self.agents_involved:
+            if msg.agent_type and msg.agent_type not in self._agents_set:
+                self._agents_set.add(msg.agent_type)
                 self.agents_involved.append(msg.agent_type)
         
         # Calculate interaction time
@@ -72,28 +100,43 @@ class Session(BaseModel):
     # Escalation tracking
     escalation_history: List[Dict[str, Any]] = Field(default_factory=list)
     
+    # Set view of tags for O(1) membership checks
+    _tags_set: Set[str] = PrivateAttr(default_factory=set)
+    
+    # Summary computed at a given updated_at and status, reused until either
+    # changes; status is also set directly, without touching updated_at
+    _summary_cache: Optional[Tuple[Tuple[datetime, SessionStatus], Dict[str, Any]]] = PrivateAttr(
+        default=None
+    )
+    _created_at_iso: str = PrivateAttr(default="")
+    
+    def model_post_init(self, __context: Any):
+        """Seed the tag set from restored tags."""
+        self._tags_set.update(self.tags)
+        self._created_at_iso = self.created_at.isoformat()
+    
     def escalate_to(self, target_agent_type: str, reason: str):
         """Record an escalation event."""
+        now = datetime.utcnow()
         escalation_event = {
             "from_agent": self.current_agent_type,
             "to_agent": target_agent_type,
             "reason": reason,
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": now.isoformat(),
         }
         
         self.escalation_history.append(escalation_event)
         self.current_agent_type = target_agent_type
         self.status = SessionStatus.ESCALATED
         self.metrics.escalation_count += 1
-        self.updated_at = datetime.utcnow()
+        self.updated_at = now
     
     def end_session(self, resolution_status: SessionStatus = SessionStatus.RESOLVED):
         """End the session with specified status."""
         self.status = resolution_status
-        self.ended_at = datetime.utcnow()
-        self.updated_at = datetime.utcnow()
+        self.ended_at = self.updated_at = datetime.utcnow()
         
-        if self.created_at and self.ended_at:
+        if self.created_at:
             self.metrics.resolution_time = (
                 self.ended_at - self.created_at
             ).total_seconds()
@@ -108,26 +151,40 @@ class Session(BaseModel):
     
     def add_tag(self, tag: str):
         """Add a tag to the session."""
-        if tag not in self.tags:
+        if tag not in self._tags_set:
+            self._tags_set.add(tag)
             self.tags.append(tag)
             self.updated_at = datetime.utcnow()
     
     def to_summary(self) -> Dict[str, Any]:
-        """Generate session summary."""
+        """
+        Generate session summary.
+        
+        The summary is cached and shared between callers, so list fields are
+        returned as tuples.
+        """
+        version = (self.updated_at, self.status)
+        if self._summary_cache and self._summary_cache[0] == version:
+            return self._summary_cache[1]
+        
         duration = None
         if self.ended_at and self.created_at:
             duration = (self.ended_at - self.created_at).total_seconds()
         
-        return {
+        summary = {
             "session_id": self.id,
             "customer_id": self.customer_id,
             "status": self.status,
-            "created_at": self.created_at.isoformat(),
+            "created_at": self._created_at_iso,
             "ended_at": self.ended_at.isoformat() if self.ended_at else None,
             "duration_seconds": duration,
             "total_messages": self.metrics.total_messages,
             "escalation_count": self.metrics.escalation_count,
-            "agents_involved": self.metrics.agents_involved,
+            "agents_involved": tuple(self.metrics.agents_involved),
             "satisfaction_score": self.metrics.satisfaction_score,
-            "tags": self.tags,
-        }
\ No newline at end of file
+            "tags": tuple(self.tags),
+        }
+        
+        self._summary_cache = (version, summary)
+        
+        return summary
\ No newline at end of file
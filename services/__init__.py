@@ -1,4 +1,4 @@
 from .state_manager import StateManager
-from .session_manager import SessionManager
+from .session_manager import SessionManager, SessionEndedError
 
-__all__ = ["StateManager", "SessionManager"]
\ No newline at end of file
+__all__ = ["StateManager", "SessionManager", "SessionEndedError"]
\ No newline at end of file
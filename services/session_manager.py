@@ -1,9 +1,14 @@
 import asyncio
-import json
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Type, TypeVar
+import ahocorasick
+import msgpack
+import orjson
 import structlog
 import redis.asyncio as redis
+from pydantic import BaseModel, TypeAdapter
 
 from models.session import Session, SessionStatus, SessionMetrics
 from models.message import Message, MessageRole, ConversationContext
@@ -11,8 +16,77 @@ from services.state_manager import StateManager
 from agents.base_agent import BaseAgent
 from utils.logging_config import get_logger
 
+try:
+    import hyperscan
+except ImportError:  # Hyperscan is only available on x86-64
+    hyperscan = None
+
 logger = get_logger(__name__)
 
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+# Sessions are stored as a hash of JSON-encoded fields plus a list of
+# escalation events, so a message turn only rewrites what it can change
+_SESSION_HASH_FIELDS = frozenset(Session.model_fields) - {"escalation_history"}
+_MESSAGE_TURN_FIELDS = frozenset(
+    {"updated_at", "status", "current_agent_type", "metrics"}
+)
+_REDIS_TTL = timedelta(hours=24)
+
+# Shared adapters so validators are resolved once rather than per call
+_SESSION_ADAPTER = TypeAdapter(Session)
+_CONTEXT_ADAPTER = TypeAdapter(ConversationContext)
+_ADAPTERS: Dict[type, TypeAdapter] = {
+    Session: _SESSION_ADAPTER,
+    ConversationContext: _CONTEXT_ADAPTER,
+}
+
+# Conversation tags and the keywords that trigger them, in tag order
+_TAG_KEYWORDS = {
+    "product-inquiry": ("product", "feature", "functionality"),
+    "technical-support": ("error", "bug", "issue", "problem"),
+    "sales-inquiry": ("price", "cost", "buy", "purchase"),
+    "positive-experience": ("thank", "great", "excellent", "helpful"),
+    "negative-experience": ("frustrated", "angry", "terrible", "worst"),
+}
+_TAG_NAMES = tuple(_TAG_KEYWORDS)
+
+
+def _build_tag_matcher() -> Any:
+    """
+    Compile every tag keyword into a single matcher.
+    
+    Uses a Hyperscan database when available and falls back to an
+    Aho-Corasick automaton otherwise.
+    """
+    if hyperscan is not None:
+        expressions, ids = [], []
+        for index, keywords in enumerate(_TAG_KEYWORDS.values()):
+            for keyword in keywords:
+                expressions.append(keyword.encode())
+                ids.append(index)
+        
+        database = hyperscan.Database()
+        database.compile(
+            expressions=expressions,
+            ids=ids,
+            elements=len(expressions),
+            flags=hyperscan.HS_FLAG_SINGLEMATCH,
+        )
+        return database
+    
+    automaton = ahocorasick.Automaton()
+    for tag, keywords in _TAG_KEYWORDS.items():
+        for keyword in keywords:
+            automaton.add_word(keyword, tag)
+    automaton.make_automaton()
+    
+    return automaton
+
+
+class SessionEndedError(ValueError):
+    """Raised when a message is sent to a session that has already ended."""
+
 
 class SessionManager:
     """
@@ -24,18 +98,71 @@ class SessionManager:
         state_manager: StateManager,
         redis_client: Optional[redis.Redis] = None,
         session_timeout_minutes: int = 30,
+        serializer: str = "msgpack",
+        context_cache_size: int = 10000,
+        context_idle_seconds: float = 3600.0,
+        write_delay: float = 0.05,
     ):
+        if serializer not in ("msgpack", "json"):
+            raise ValueError(f"Unsupported serializer: {serializer}")
+        
         self.state_manager = state_manager
         self.redis_client = redis_client
         self.session_timeout_minutes = session_timeout_minutes
-        self.contexts: Dict[str, ConversationContext] = {}
-        self._lock = asyncio.Lock()
+        self.serializer = serializer
+        self.context_cache_size = context_cache_size
+        self.context_idle_seconds = context_idle_seconds
+        self.write_delay = write_delay
+        self._tag_matcher = _build_tag_matcher()
+        
+        # LRU of recently used contexts; Redis remains the source of truth
+        self.contexts: "OrderedDict[str, ConversationContext]" = OrderedDict()
+        self._context_touched: Dict[str, float] = {}
+        self._eviction_task = None
+        
+        # Serializes message processing within a session; the contexts dict
+        # itself needs no lock as it is only touched between awaits
+        self._session_locks: Dict[str, asyncio.Lock] = {}
+        
+        # Latest unwritten state per session, flushed to Redis in batches by
+        # the writer task; holds session, context, fields and new escalations
+        self._pending_writes: Dict[
+            str,
+            Tuple[Session, Optional[ConversationContext], Optional[frozenset], List[Dict]],
+        ] = {}
+        
+        # Sessions whose write is in flight, readable until Redis has them
+        self._flushing: Dict[str, Session] = {}
+        self._write_lock = asyncio.Lock()
+        self._write_ready = asyncio.Event()
+        self._writer_task = None
         
         logger.info(
             "session_manager_initialized",
-            timeout_minutes=session_timeout_minutes
+            timeout_minutes=session_timeout_minutes,
+            serializer=serializer,
         )
     
+    async def start(self):
+        """Start background tasks."""
+        self._eviction_task = asyncio.create_task(self._eviction_loop())
+        if self.redis_client:
+            self._writer_task = asyncio.create_task(self._writer_loop())
+    
+    async def stop(self):
+        """Stop background tasks and write any pending state."""
+        tasks = [task for task in (self._eviction_task, self._writer_task) if task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._writer_task = None
+        
+        await self.flush()
+    
+    async def flush(self):
+        """Write all pending sessions and contexts to Redis."""
+        await self._flush(list(self._pending_writes))
+    
     async def create_session(
         self,
         customer_id: Optional[str] = None,
@@ -55,12 +182,10 @@ class SessionManager:
             customer_info={"customer_id": customer_id} if customer_id else {},
         )
         
-        async with self._lock:
-            self.contexts[session.id] = context
+        self._cache_context(session.id, context)
         
         # Persist to Redis if available
-        await self._persist_session(session)
-        await self._persist_context(context)
+        await self._persist_session_and_context(session, context)
         
         # Assign to agent
         agent = await self.state_manager.assign_session_to_agent(
@@ -91,17 +216,35 @@ class SessionManager:
         customer_metadata: Optional[Dict] = None,
     ) -> Tuple[Message, Session]:
         """Process a customer message in a session."""
+        # Messages within a session are processed one at a time
+        async with self._get_session_lock(session_id):
+            return await self._process_message(
+                session_id, message_content, customer_metadata
+            )
+    
+    async def _process_message(
+        self,
+        session_id: str,
+        message_content: str,
+        customer_metadata: Optional[Dict],
+    ) -> Tuple[Message, Session]:
+        """Process a customer message while holding the session lock."""
         # Get session and context
-        session = await self._get_session(session_id)
+        session, context = await self._get_session_and_context(session_id)
         if not session:
             raise ValueError(f"Session {session_id} not found")
         
-        context = await self._get_context(session_id)
         if not context:
             raise ValueError(f"Context for session {session_id} not found")
         
+        # Ended sessions are final; their details may already be cached
+        if session.ended_at is not None:
+            raise SessionEndedError(f"Session {session_id} has ended")
+        
+        escalations_before = len(session.escalation_history)
+        
         # Create user message
-        user_message = Message(
+        user_message = Message.create(
             role=MessageRole.USER,
             content=message_content,
             metadata=customer_metadata or {},
@@ -109,13 +252,14 @@ class SessionManager:
         
         # Add to context
         context.add_message(user_message)
+        session.metrics.on_message_added(user_message)
         
         # Get current agent
-        agent = None
-        for ag in self.state_manager.agents.values():
-            if ag.agent_type == session.current_agent_type:
-                agent = ag
-                break
+        agent = self.state_manager.get_session_agent(session_id)
+        if agent is None:
+            agent = self.state_manager.agents_by_type.get(
+                session.current_agent_type, [None]
+            )[0]
         
         if not agent:
             logger.error(
@@ -132,6 +276,7 @@ class SessionManager:
         
         # Add response to context
         context.add_message(response_message)
+        session.metrics.on_message_added(response_message)
         
         # Handle escalation if needed
         if escalation_target:
@@ -147,14 +292,24 @@ class SessionManager:
                     metadata={"escalation": True, "target": escalation_target},
                 )
                 context.add_message(escalation_message)
-        
-        # Update session
-        session.updated_at = datetime.utcnow()
-        session.metrics.update_from_context(context)
-        
-        # Persist updates
-        await self._persist_session(session)
-        await self._persist_context(context)
+                session.metrics.on_message_added(escalation_message)
+        
+        # Update session, reusing the timestamp of the turn's last message
+        session.updated_at = context.updated_at
+        session.metrics.interaction_time = context.get_conversation_duration()
+        
+        # Persist only the session fields a message turn changes, leaving
+        # the write to the writer task when it is running
+        new_escalations = session.escalation_history[escalations_before:]
+        if self._writer_task is not None:
+            self._schedule_write(session, context, _MESSAGE_TURN_FIELDS, new_escalations)
+        else:
+            await self._persist_session_and_context(
+                session,
+                context,
+                fields=_MESSAGE_TURN_FIELDS,
+                new_escalations=new_escalations,
+            )
         
         logger.info(
             "message_processed",
@@ -172,7 +327,24 @@ class SessionManager:
         resolution_status: SessionStatus = SessionStatus.RESOLVED,
     ) -> Session:
         """End a session with optional satisfaction score."""
-        session = await self._get_session(session_id)
+        # Wait for any in-flight message so its writes cannot land afterwards
+        try:
+            async with self._get_session_lock(session_id):
+                return await self._end_session(
+                    session_id, satisfaction_score, resolution_status
+                )
+        finally:
+            # Drop the lock now that no further messages are expected
+            self._discard_idle_session_lock(session_id)
+    
+    async def _end_session(
+        self,
+        session_id: str,
+        satisfaction_score: Optional[float],
+        resolution_status: SessionStatus,
+    ) -> Session:
+        """End a session while holding the session lock."""
+        session, context = await self._get_session_and_context(session_id)
         if not session:
             raise ValueError(f"Session {session_id} not found")
         
@@ -183,11 +355,8 @@ class SessionManager:
         if satisfaction_score is not None:
             session.set_satisfaction_score(satisfaction_score)
         
-        # Get final context for analytics
-        context = await self._get_context(session_id)
+        # Final context for analytics
         if context:
-            session.metrics.update_from_context(context)
-            
             # Analyze conversation for tags
             tags = await self._analyze_conversation(context)
             for tag in tags:
@@ -199,9 +368,6 @@ class SessionManager:
         # Persist final state
         await self._persist_session(session)
         
-        # Schedule cleanup
-        asyncio.create_task(self._schedule_cleanup(session_id))
-        
         logger.info(
             "session_ended",
             session_id=session_id,
@@ -224,16 +390,19 @@ class SessionManager:
         
         return context.to_transcript()
     
+    async def get_session_transcript_lines(
+        self, session_id: str
+    ) -> Optional[Iterator[str]]:
+        """Get the transcript of a session as an iterator of lines."""
+        context = await self._get_context(session_id)
+        if not context or not context.messages:
+            return None
+        
+        return context.iter_transcript_lines()
+    
     async def get_active_sessions(self) -> List[Session]:
         """Get all active sessions."""
-        sessions = []
-        
-        for session_id in self.state_manager.active_sessions:
-            session = await self._get_session(session_id)
-            if session:
-                sessions.append(session)
-        
-        return sessions
+        return await self._get_sessions(list(self.state_manager.active_sessions))
     
     async def get_session_analytics(
         self, start_date: datetime, end_date: datetime
@@ -254,18 +423,84 @@ class SessionManager:
         # Implementation would aggregate from persistent storage
         return analytics
     
+    def _cache_context(
+        self, session_id: str, context: ConversationContext
+    ) -> ConversationContext:
+        """Cache a context, keeping any copy loaded concurrently."""
+        context = self.contexts.setdefault(session_id, context)
+        self._touch_context(session_id)
+        
+        # Evict the least recently used contexts once over capacity
+        while len(self.contexts) > self.context_cache_size:
+            self._evict_oldest_context()
+        
+        return context
+    
+    def _get_cached_session(self, session_id: str) -> Optional[Session]:
+        """Get a session from memory or a pending write, without Redis."""
+        session = self.state_manager.active_sessions.get(session_id)
+        if session is not None:
+            return session
+        
+        # An ended session may not have been written yet
+        pending = self._pending_writes.get(session_id)
+        if pending is not None:
+            return pending[0]
+        
+        return self._flushing.get(session_id)
+    
+    def _get_cached_context(self, session_id: str) -> Optional[ConversationContext]:
+        """Get a context from the cache or a pending write, without Redis."""
+        context = self.contexts.get(session_id)
+        if context is not None:
+            self._touch_context(session_id)
+            return context
+        
+        # An evicted context may not have been written yet
+        pending = self._pending_writes.get(session_id)
+        if pending is not None and pending[1] is not None:
+            return self._cache_context(session_id, pending[1])
+        
+        return None
+    
+    def _touch_context(self, session_id: str):
+        """Mark a cached context as most recently used."""
+        self.contexts.move_to_end(session_id)
+        self._context_touched[session_id] = time.monotonic()
+    
+    def _evict_oldest_context(self):
+        """Drop the least recently used context and its idle session lock."""
+        session_id, _ = self.contexts.popitem(last=False)
+        del self._context_touched[session_id]
+        self._discard_idle_session_lock(session_id)
+    
+    def _discard_idle_session_lock(self, session_id: str):
+        """Drop a session lock unless it is held or awaited."""
+        lock = self._session_locks.get(session_id)
+        if lock is not None and not lock.locked() and not lock._waiters:
+            del self._session_locks[session_id]
+    
+    def _get_session_lock(self, session_id: str) -> asyncio.Lock:
+        """Get the lock serializing work on a session, creating it if needed."""
+        lock = self._session_locks.get(session_id)
+        if lock is None:
+            lock = self._session_locks[session_id] = asyncio.Lock()
+        return lock
+    
     async def _get_session(self, session_id: str) -> Optional[Session]:
         """Get session from cache or Redis."""
-        # Check active sessions first
-        if session_id in self.state_manager.active_sessions:
-            return self.state_manager.active_sessions[session_id]
+        # Check memory first
+        session = self._get_cached_session(session_id)
+        if session is not None:
+            return session
         
         # Try Redis if available
         if self.redis_client:
             try:
-                data = await self.redis_client.get(f"session:{session_id}")
-                if data:
-                    return Session.model_validate_json(data)
+                async with self.redis_client.pipeline(transaction=False) as pipe:
+                    self._queue_session_read(pipe, session_id)
+                    fields, escalations = await pipe.execute()
+                return self._hydrate_session(fields, escalations)
             except Exception as e:
                 logger.error(
                     "redis_get_session_error",
@@ -275,23 +510,52 @@ class SessionManager:
         
         return None
     
+    async def _get_sessions(self, session_ids: List[str]) -> List[Session]:
+        """Get sessions from cache, fetching any misses from Redis in one round trip."""
+        sessions = []
+        misses = []
+        
+        for session_id in session_ids:
+            session = self._get_cached_session(session_id)
+            if session is not None:
+                sessions.append(session)
+            else:
+                misses.append(session_id)
+        
+        if misses and self.redis_client:
+            try:
+                async with self.redis_client.pipeline(transaction=False) as pipe:
+                    for session_id in misses:
+                        self._queue_session_read(pipe, session_id)
+                    results = await pipe.execute()
+                
+                for fields, escalations in zip(results[::2], results[1::2]):
+                    session = self._hydrate_session(fields, escalations)
+                    if session:
+                        sessions.append(session)
+            except Exception as e:
+                logger.error(
+                    "redis_get_sessions_error",
+                    session_count=len(misses),
+                    error=str(e)
+                )
+        
+        return sessions
+    
     async def _get_context(self, session_id: str) -> Optional[ConversationContext]:
         """Get context from cache or Redis."""
         # Check memory cache first
-        async with self._lock:
-            if session_id in self.contexts:
-                return self.contexts[session_id]
+        context = self._get_cached_context(session_id)
+        if context is not None:
+            return context
         
         # Try Redis if available
         if self.redis_client:
             try:
                 data = await self.redis_client.get(f"context:{session_id}")
                 if data:
-                    context = ConversationContext.model_validate_json(data)
-                    # Cache it
-                    async with self._lock:
-                        self.contexts[session_id] = context
-                    return context
+                    context = self._deserialize(ConversationContext, data)
+                    return self._cache_context(session_id, context)
             except Exception as e:
                 logger.error(
                     "redis_get_context_error",
@@ -301,61 +565,227 @@ class SessionManager:
         
         return None
     
-    async def _persist_session(self, session: Session):
-        """Persist session to Redis."""
-        if self.redis_client:
+    async def _get_session_and_context(
+        self, session_id: str
+    ) -> Tuple[Optional[Session], Optional[ConversationContext]]:
+        """Get session and context, fetching any missing from Redis in one round trip."""
+        session = self._get_cached_session(session_id)
+        context = self._get_cached_context(session_id)
+        
+        if (session is None or context is None) and self.redis_client:
             try:
-                await self.redis_client.setex(
-                    f"session:{session.id}",
-                    timedelta(hours=24),
-                    session.model_dump_json(),
-                )
+                async with self.redis_client.pipeline(transaction=False) as pipe:
+                    self._queue_session_read(pipe, session_id)
+                    pipe.get(f"context:{session_id}")
+                    fields, escalations, context_data = await pipe.execute()
+                
+                if session is None:
+                    session = self._hydrate_session(fields, escalations)
+                if context is None and context_data:
+                    context = self._deserialize(ConversationContext, context_data)
+                    context = self._cache_context(session_id, context)
             except Exception as e:
                 logger.error(
-                    "redis_persist_session_error",
-                    session_id=session.id,
+                    "redis_get_session_context_error",
+                    session_id=session_id,
                     error=str(e)
                 )
+        
+        return session, context
     
-    async def _persist_context(self, context: ConversationContext):
-        """Persist context to Redis."""
-        if self.redis_client:
+    async def _persist_session(self, session: Session):
+        """Persist session to Redis."""
+        self._schedule_write(session)
+        await self._flush([session.id])
+    
+    async def _persist_session_and_context(
+        self,
+        session: Session,
+        context: ConversationContext,
+        fields: Optional[frozenset] = None,
+        new_escalations: Optional[List[Dict]] = None,
+    ):
+        """Persist session and context to Redis in one round trip."""
+        self._schedule_write(session, context, fields, new_escalations)
+        await self._flush([session.id])
+    
+    def _schedule_write(
+        self,
+        session: Session,
+        context: Optional[ConversationContext] = None,
+        fields: Optional[frozenset] = None,
+        new_escalations: Optional[List[Dict]] = None,
+    ):
+        """Record a pending write, merging it with any already pending for the session."""
+        if not self.redis_client:
+            return
+        
+        new_escalations = list(new_escalations or ())
+        pending = self._pending_writes.get(session.id)
+        if pending is not None:
+            _, pending_context, pending_fields, pending_escalations = pending
+            context = context or pending_context
+            if fields is not None and pending_fields is not None:
+                fields = pending_fields | fields
+            else:
+                fields = None
+            new_escalations = pending_escalations + new_escalations
+        
+        self._pending_writes[session.id] = (session, context, fields, new_escalations)
+        self._write_ready.set()
+    
+    async def _flush(self, session_ids: List[str]):
+        """Write the pending state of the given sessions in one round trip."""
+        if not self.redis_client:
+            return
+        
+        # Writes are serialized so escalation appends land in order
+        async with self._write_lock:
+            writes = [
+                self._pending_writes.pop(session_id)
+                for session_id in session_ids
+                if session_id in self._pending_writes
+            ]
+            if not writes:
+                return
+            
+            for session, *_ in writes:
+                self._flushing[session.id] = session
+            
             try:
-                await self.redis_client.setex(
-                    f"context:{context.session_id}",
-                    timedelta(hours=24),
-                    context.model_dump_json(),
-                )
+                async with self.redis_client.pipeline(transaction=False) as pipe:
+                    for session, context, fields, new_escalations in writes:
+                        self._queue_session_write(pipe, session, fields, new_escalations)
+                        if context is not None:
+                            pipe.setex(
+                                f"context:{session.id}",
+                                _REDIS_TTL,
+                                self._serialize(context),
+                            )
+                    await pipe.execute()
             except Exception as e:
                 logger.error(
-                    "redis_persist_context_error",
-                    session_id=context.session_id,
+                    "redis_persist_error",
+                    session_count=len(session_ids),
                     error=str(e)
                 )
+            finally:
+                for session, *_ in writes:
+                    self._flushing.pop(session.id, None)
     
-    async def _analyze_conversation(self, context: ConversationContext) -> List[str]:
-        """Analyze conversation and generate tags."""
-        tags = []
+    @staticmethod
+    def _queue_session_write(
+        pipe,
+        session: Session,
+        fields: Optional[frozenset] = None,
+        new_escalations: Optional[List[Dict]] = None,
+    ):
+        """
+        Queue a session write onto a Redis pipeline.
+        
+        Without fields, every field and the whole escalation history are
+        written. Otherwise only the given fields are set, the rest are filled
+        in only where missing, and new_escalations are appended to the
+        stored history.
+        """
+        key = f"session:{session.id}:fields"
+        escalations_key = f"session:{session.id}:escalations"
+        
+        values = session.model_dump(mode="json", include=fields or _SESSION_HASH_FIELDS)
+        pipe.hset(
+            key,
+            mapping={field: orjson.dumps(value) for field, value in values.items()},
+        )
+        if fields is not None:
+            # Recreate the hash if it expired or was evicted since the last
+            # write, without overwriting anything written since
+            missing = session.model_dump(mode="json", include=_SESSION_HASH_FIELDS - fields)
+            for field, value in missing.items():
+                pipe.hsetnx(key, field, orjson.dumps(value))
+        pipe.expire(key, _REDIS_TTL)
+        
+        if fields is None:
+            pipe.delete(escalations_key)
+            new_escalations = session.escalation_history
+        
+        if new_escalations:
+            pipe.rpush(escalations_key, *(orjson.dumps(event) for event in new_escalations))
+            pipe.expire(escalations_key, _REDIS_TTL)
+    
+    @staticmethod
+    def _queue_session_read(pipe, session_id: str):
+        """Queue reads of a session's fields and escalation history."""
+        pipe.hgetall(f"session:{session_id}:fields")
+        pipe.lrange(f"session:{session_id}:escalations", 0, -1)
+    
+    @staticmethod
+    def _hydrate_session(
+        fields: Dict[bytes, bytes], escalations: List[bytes]
+    ) -> Optional[Session]:
+        """Build a session from its stored hash fields and escalation events."""
+        # A hash without an id was never fully written
+        if b"id" not in fields:
+            return None
         
-        # Analyze message content for common themes
-        all_content = " ".join([msg.content.lower() for msg in context.messages])
+        data = {name.decode(): orjson.loads(value) for name, value in fields.items()}
+        data["escalation_history"] = [orjson.loads(event) for event in escalations]
+        return _SESSION_ADAPTER.validate_python(data)
+    
+    def _serialize(self, model: BaseModel) -> bytes:
+        """Serialize a model for Redis in the configured format."""
+        if self.serializer == "json":
+            return _ADAPTERS[type(model)].dump_json(model)
+        
+        # Datetimes are naive UTC, so they are stored as ISO strings rather
+        # than msgpack timestamps, which require timezone-aware values
+        return msgpack.packb(model.model_dump(mode="json"), use_bin_type=True)
+    
+    @staticmethod
+    def _deserialize(model_type: Type[ModelT], data: bytes) -> ModelT:
+        """Deserialize a model from Redis in either format."""
+        # JSON payloads are objects and always start with "{", which is never
+        # the first byte of a msgpack map
+        adapter = _ADAPTERS[model_type]
+        if data[:1] == b"{":
+            return adapter.validate_json(data)
+        return adapter.validate_python(msgpack.unpackb(data, raw=False))
+    
+    def _find_tags(self, context: ConversationContext) -> Set[str]:
+        """Find every tag whose keywords appear in the conversation."""
+        found = set()
+        
+        # Single pass over each message for all tag keywords
+        if hyperscan is not None:
+            def on_match(index, start_index, end_index, flags, match_context):
+                found.add(_TAG_NAMES[index])
+            
+            for msg in context.messages:
+                self._tag_matcher.scan(
+                    msg.content_lower.encode(), match_event_handler=on_match
+                )
+            return found
         
-        # Product-related tags
-        if any(word in all_content for word in ["product", "feature", "functionality"]):
-            tags.append("product-inquiry")
+        for msg in context.messages:
+            for _, tag in self._tag_matcher.iter(msg.content_lower):
+                found.add(tag)
         
-        # Support-related tags
-        if any(word in all_content for word in ["error", "bug", "issue", "problem"]):
-            tags.append("technical-support")
+        return found
+    
+    async def _analyze_conversation(self, context: ConversationContext) -> List[str]:
+        """Analyze conversation and generate tags."""
+        found = self._find_tags(context)
         
-        # Sales-related tags
-        if any(word in all_content for word in ["price", "cost", "buy", "purchase"]):
-            tags.append("sales-inquiry")
+        tags = [
+            tag for tag in (
+                "product-inquiry", "technical-support", "sales-inquiry"
+            )
+            if tag in found
+        ]
         
         # Satisfaction indicators
-        if any(word in all_content for word in ["thank", "great", "excellent", "helpful"]):
+        if "positive-experience" in found:
             tags.append("positive-experience")
-        elif any(word in all_content for word in ["frustrated", "angry", "terrible", "worst"]):
+        elif "negative-experience" in found:
             tags.append("negative-experience")
         
         # Escalation
@@ -364,14 +794,43 @@ class SessionManager:
         
         return tags
     
-    async def _schedule_cleanup(self, session_id: str):
-        """Schedule cleanup of session data after delay."""
-        # Wait before cleanup
-        await asyncio.sleep(3600)  # 1 hour
-        
-        # Remove from memory cache
-        async with self._lock:
-            if session_id in self.contexts:
-                del self.contexts[session_id]
-        
-        logger.info("session_cleaned_up", session_id=session_id)
\ No newline at end of file
+    async def _eviction_loop(self):
+        """Background task to drop contexts that have been idle too long."""
+        while True:
+            try:
+                await asyncio.sleep(60)  # Run every minute
+                
+                # Contexts are kept in recency order, so idle ones are at the front
+                cutoff = time.monotonic() - self.context_idle_seconds
+                evicted = 0
+                for session_id in self.contexts:
+                    if self._context_touched[session_id] > cutoff:
+                        break
+                    evicted += 1
+                
+                for _ in range(evicted):
+                    self._evict_oldest_context()
+                
+                if evicted:
+                    logger.info("contexts_evicted", count=evicted)
+            
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error("context_eviction_error", error=str(e))
+    
+    async def _writer_loop(self):
+        """Background task to write pending state to Redis in coalesced batches."""
+        while True:
+            try:
+                await self._write_ready.wait()
+                
+                # Let further writes to the same sessions coalesce
+                await asyncio.sleep(self.write_delay)
+                self._write_ready.clear()
+                await self.flush()
+            
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error("writer_loop_error", error=str(e))
\ No newline at end of file
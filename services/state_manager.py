@@ -1,8 +1,11 @@
 import asyncio
+import heapq
+import itertools
+import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 import structlog
-from collections import defaultdict
+from collections import Counter, defaultdict
 
 from agents.base_agent import BaseAgent
 from models.session import Session, SessionStatus
@@ -10,6 +13,21 @@ from utils.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# Load heaps are rebuilt once stale entries outnumber live agents this many times
+_LOAD_HEAP_SLACK = 4
+
+# How long a computed system metrics snapshot is served before recomputing
+_METRICS_CACHE_SECONDS = 1.0
+
+# How often the cached ISO timestamp used in reports is refreshed
+_ISO_NOW_INTERVAL = 0.1
+
+# Sessions inactive for longer than this are abandoned
+_SESSION_TIMEOUT = timedelta(minutes=30)
+
+# Longest a single agent's health check may take before it is reported unhealthy
+_AGENT_HEALTH_TIMEOUT = 10.0
+
 
 class StateManager:
     """
@@ -20,8 +38,22 @@ class StateManager:
     def __init__(self, redis_client=None):
         self.redis_client = redis_client
         self.agents: Dict[str, BaseAgent] = {}
+        self.agents_by_type: Dict[str, List[BaseAgent]] = {}
         self.active_sessions: Dict[str, Session] = {}
+        self._session_agent: Dict[str, str] = {}
+        
+        # Active sessions per current agent type, kept up to date on every change
+        self._type_counts: Counter = Counter()
+        
+        # Min-heap of (deadline, session_id); a deadline is rechecked against
+        # updated_at when popped, so activity needs no heap update
+        self._expiry_heap: List[Tuple[datetime, str]] = []
         self.agent_load: Dict[str, int] = defaultdict(int)
+        
+        # Per-type min-heaps of (load, sequence, agent_id); entries whose load
+        # no longer matches agent_load are stale and skipped lazily
+        self._load_heaps: Dict[str, List[Tuple[int, int, str]]] = {}
+        self._load_sequence = itertools.count()
         self.system_metrics = {
             "total_sessions": 0,
             "active_sessions": 0,
@@ -30,7 +62,8 @@ class StateManager:
             "average_resolution_time": 0.0,
             "total_escalations": 0,
         }
-        self._lock = asyncio.Lock()
+        self._metrics_cache: Optional[Tuple[float, Dict[str, Any]]] = None
+        self._iso_now_cache: Tuple[float, str] = (float("-inf"), "")
         
         # Start background tasks
         self._cleanup_task = None
@@ -57,139 +90,197 @@ class StateManager:
             self._metrics_task,
             return_exceptions=True
         )
+        
+        # Stop agent health probes
+        await asyncio.gather(*(agent.close() for agent in self.agents.values()))
         logger.info("state_manager_stopped")
     
     def register_agent(self, agent: BaseAgent):
         """Register an agent with the state manager."""
         self.agents[agent.agent_id] = agent
+        self.agents_by_type.setdefault(agent.agent_type, []).append(agent)
         self.agent_load[agent.agent_id] = 0
-        logger.info(
-            "agent_registered",
-            agent_id=agent.agent_id,
-            agent_type=agent.agent_type
-        )
+        self._push_load(agent)
+        agent.logger.info("agent_registered")
     
     def unregister_agent(self, agent_id: str):
         """Unregister an agent."""
         if agent_id in self.agents:
-            del self.agents[agent_id]
+            agent = self.agents.pop(agent_id)
             del self.agent_load[agent_id]
-            logger.info("agent_unregistered", agent_id=agent_id)
+            
+            agents_of_type = self.agents_by_type[agent.agent_type]
+            agents_of_type.remove(agent)
+            if not agents_of_type:
+                del self.agents_by_type[agent.agent_type]
+                del self._load_heaps[agent.agent_type]
+            else:
+                self._rebuild_load_heap(agent.agent_type)
+            agent.logger.info("agent_unregistered")
+    
+    def get_session_agent(self, session_id: str) -> Optional[BaseAgent]:
+        """Get the agent a session is currently assigned to."""
+        agent_id = self._session_agent.get(session_id)
+        return self.agents.get(agent_id) if agent_id else None
     
     async def assign_session_to_agent(
         self, session: Session, preferred_agent_type: Optional[str] = None
     ) -> Optional[BaseAgent]:
         """
         Assign a session to an available agent based on load balancing.
+        
+        Session operations never await while updating shared state, so the
+        event loop already serializes them and no lock is needed.
         """
-        async with self._lock:
-            # Filter agents by type if specified
-            available_agents = [
-                agent for agent in self.agents.values()
-                if not preferred_agent_type or agent.agent_type == preferred_agent_type
-            ]
-            
-            if not available_agents:
-                logger.warning(
-                    "no_agents_available",
-                    preferred_type=preferred_agent_type
-                )
-                return None
-            
-            # Find agent with lowest load
-            best_agent = min(
-                available_agents,
-                key=lambda a: self.agent_load[a.agent_id]
-            )
-            
-            # Assign session
-            self.active_sessions[session.id] = session
-            self.agent_load[best_agent.agent_id] += 1
-            session.current_agent_type = best_agent.agent_type
-            
-            # Update metrics
-            self.system_metrics["total_sessions"] += 1
-            self.system_metrics["active_sessions"] = len(self.active_sessions)
-            
-            logger.info(
-                "session_assigned",
-                session_id=session.id,
-                agent_id=best_agent.agent_id,
-                agent_type=best_agent.agent_type,
-                current_load=self.agent_load[best_agent.agent_id]
-            )
-            
-            return best_agent
+        return self._assign(session, preferred_agent_type)
     
     async def release_session(self, session_id: str):
         """Release a session from an agent."""
-        async with self._lock:
-            if session_id not in self.active_sessions:
-                return
-            
-            session = self.active_sessions[session_id]
-            
-            # Find the agent handling this session
-            for agent in self.agents.values():
-                if agent.agent_type == session.current_agent_type:
-                    self.agent_load[agent.agent_id] = max(
-                        0, self.agent_load[agent.agent_id] - 1
-                    )
-                    break
-            
-            # Remove from active sessions
-            del self.active_sessions[session_id]
-            
-            # Update metrics
-            self.system_metrics["active_sessions"] = len(self.active_sessions)
-            self.system_metrics["completed_sessions"] += 1
-            
-            logger.info(
-                "session_released",
-                session_id=session_id,
-                final_status=session.status
-            )
+        self._release(session_id)
     
     async def escalate_session(
         self, session_id: str, target_agent_type: str, reason: str
     ) -> Optional[BaseAgent]:
         """Escalate a session to a different agent type."""
-        async with self._lock:
-            if session_id not in self.active_sessions:
-                logger.warning("session_not_found", session_id=session_id)
-                return None
-            
-            session = self.active_sessions[session_id]
-            current_agent_type = session.current_agent_type
-            
-            # Release from current agent
-            for agent in self.agents.values():
-                if agent.agent_type == current_agent_type:
-                    self.agent_load[agent.agent_id] = max(
-                        0, self.agent_load[agent.agent_id] - 1
-                    )
-                    break
-            
-            # Record escalation
-            session.escalate_to(target_agent_type, reason)
-            
-            # Assign to new agent
-            new_agent = await self.assign_session_to_agent(
-                session, target_agent_type
+        if session_id not in self.active_sessions:
+            logger.warning("session_not_found", session_id=session_id)
+            return None
+        
+        session = self.active_sessions[session_id]
+        current_agent_type = session.current_agent_type
+        
+        # Release from current agent
+        self._decrement_load(session_id)
+        
+        # Record escalation
+        session.escalate_to(target_agent_type, reason)
+        if current_agent_type:
+            self._type_counts[current_agent_type] -= 1
+        self._type_counts[target_agent_type] += 1
+        
+        # Assign to new agent
+        new_agent = self._assign(session, target_agent_type)
+        
+        # Update metrics
+        self.system_metrics["total_escalations"] += 1
+        
+        logger.info(
+            "session_escalated",
+            session_id=session_id,
+            from_agent=current_agent_type,
+            to_agent=target_agent_type,
+            reason=reason
+        )
+        
+        return new_agent
+    
+    def _assign(
+        self, session: Session, preferred_agent_type: Optional[str]
+    ) -> Optional[BaseAgent]:
+        """Assign a session to the least loaded agent."""
+        # Find agent with lowest load, of the preferred type if specified
+        if preferred_agent_type:
+            best_agent = self._least_loaded(preferred_agent_type)
+        elif self.agents:
+            best_agent = min(
+                self.agents.values(),
+                key=lambda a: self.agent_load[a.agent_id]
             )
-            
-            # Update metrics
-            self.system_metrics["total_escalations"] += 1
-            
-            logger.info(
-                "session_escalated",
-                session_id=session_id,
-                from_agent=current_agent_type,
-                to_agent=target_agent_type,
-                reason=reason
+        else:
+            best_agent = None
+        
+        if best_agent is None:
+            logger.warning(
+                "no_agents_available",
+                preferred_type=preferred_agent_type
             )
-            
-            return new_agent
+            return None
+        
+        # Assign session; escalations already counted the new type
+        if session.id not in self.active_sessions:
+            heapq.heappush(
+                self._expiry_heap, (session.updated_at + _SESSION_TIMEOUT, session.id)
+            )
+            self._type_counts[best_agent.agent_type] += 1
+        self.active_sessions[session.id] = session
+        self._session_agent[session.id] = best_agent.agent_id
+        self.agent_load[best_agent.agent_id] += 1
+        self._push_load(best_agent)
+        session.current_agent_type = best_agent.agent_type
+        
+        # Update metrics
+        self.system_metrics["total_sessions"] += 1
+        self.system_metrics["active_sessions"] = len(self.active_sessions)
+        
+        best_agent.logger.info(
+            "session_assigned",
+            session_id=session.id,
+            current_load=self.agent_load[best_agent.agent_id]
+        )
+        
+        return best_agent
+    
+    def _release(self, session_id: str):
+        """Release a session from its agent."""
+        if session_id not in self.active_sessions:
+            return
+        
+        session = self.active_sessions[session_id]
+        
+        # Release from the agent handling this session
+        self._decrement_load(session_id)
+        if session.current_agent_type:
+            self._type_counts[session.current_agent_type] -= 1
+        
+        # Remove from active sessions
+        del self.active_sessions[session_id]
+        
+        # Update metrics
+        self.system_metrics["active_sessions"] = len(self.active_sessions)
+        self.system_metrics["completed_sessions"] += 1
+        
+        logger.info(
+            "session_released",
+            session_id=session_id,
+            final_status=session.status
+        )
+    
+    def _decrement_load(self, session_id: str):
+        """Decrement the load of the agent handling a session."""
+        agent_id = self._session_agent.pop(session_id, None)
+        if agent_id in self.agent_load:
+            self.agent_load[agent_id] = max(0, self.agent_load[agent_id] - 1)
+            self._push_load(self.agents[agent_id])
+    
+    def _least_loaded(self, agent_type: str) -> Optional[BaseAgent]:
+        """Get the least loaded agent of a type from its load heap."""
+        heap = self._load_heaps.get(agent_type, [])
+        while heap:
+            load, _, agent_id = heap[0]
+            if self.agent_load.get(agent_id) == load:
+                return self.agents[agent_id]
+            heapq.heappop(heap)
+        
+        return None
+    
+    def _push_load(self, agent: BaseAgent):
+        """Record an agent's current load in its type's heap."""
+        heap = self._load_heaps.setdefault(agent.agent_type, [])
+        heapq.heappush(
+            heap, (self.agent_load[agent.agent_id], next(self._load_sequence), agent.agent_id)
+        )
+        
+        if len(heap) > _LOAD_HEAP_SLACK * len(self.agents_by_type[agent.agent_type]):
+            self._rebuild_load_heap(agent.agent_type)
+    
+    def _rebuild_load_heap(self, agent_type: str):
+        """Rebuild a type's load heap from current loads, dropping stale entries."""
+        heap = [
+            (self.agent_load[agent.agent_id], next(self._load_sequence), agent.agent_id)
+            for agent in self.agents_by_type[agent_type]
+        ]
+        heapq.heapify(heap)
+        self._load_heaps[agent_type] = heap
     
     def get_agent_workload(self) -> Dict[str, Dict[str, Any]]:
         """Get current workload for all agents."""
@@ -205,58 +296,82 @@ class StateManager:
         return workload
     
     def get_system_metrics(self) -> Dict[str, Any]:
-        """Get system-wide metrics."""
-        # Calculate averages
-        if self.system_metrics["completed_sessions"] > 0:
-            completed = self.system_metrics["completed_sessions"]
-            self.system_metrics["escalation_rate"] = (
-                self.system_metrics["total_escalations"] / completed
-            )
+        """
+        Get system-wide metrics.
         
-        return {
+        The snapshot is reused for up to a second, so frequent polling does not
+        rebuild it on every call.
+        """
+        now = time.monotonic()
+        if self._metrics_cache and now - self._metrics_cache[0] < _METRICS_CACHE_SECONDS:
+            return self._metrics_cache[1]
+        
+        metrics = {
             **self.system_metrics,
             "agent_count": len(self.agents),
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": self._iso_now(),
         }
+        
+        # Derived rates go into the snapshot only; system_metrics holds counters
+        completed = self.system_metrics["completed_sessions"]
+        if completed > 0:
+            metrics["escalation_rate"] = self.system_metrics["total_escalations"] / completed
+        
+        self._metrics_cache = (now, metrics)
+        
+        return metrics
+    
+    def _iso_now(self) -> str:
+        """Get the current UTC time in ISO format, reformatted at most every 100ms."""
+        tick = time.monotonic()
+        if tick - self._iso_now_cache[0] >= _ISO_NOW_INTERVAL:
+            self._iso_now_cache = (tick, datetime.utcnow().isoformat())
+        return self._iso_now_cache[1]
     
     async def get_session_distribution(self) -> Dict[str, int]:
         """Get distribution of sessions by agent type."""
-        distribution = defaultdict(int)
-        
-        async with self._lock:
-            for session in self.active_sessions.values():
-                if session.current_agent_type:
-                    distribution[session.current_agent_type] += 1
-        
-        return dict(distribution)
+        return {
+            agent_type: count
+            for agent_type, count in self._type_counts.items()
+            if count
+        }
     
     async def _cleanup_loop(self):
         """Background task to clean up abandoned sessions."""
         while True:
             try:
-                await asyncio.sleep(300)  # Run every 5 minutes
+                # Sleep until the earliest deadline, checking at least every 5 minutes
+                delay = 300.0
+                if self._expiry_heap:
+                    delay = min(
+                        delay,
+                        (self._expiry_heap[0][0] - datetime.utcnow()).total_seconds(),
+                    )
+                await asyncio.sleep(max(delay, 1.0))
                 
-                async with self._lock:
-                    abandoned_sessions = []
-                    current_time = datetime.utcnow()
+                current_time = datetime.utcnow()
+                while self._expiry_heap and self._expiry_heap[0][0] <= current_time:
+                    _, session_id = heapq.heappop(self._expiry_heap)
+                    session = self.active_sessions.get(session_id)
+                    if session is None:
+                        continue
                     
-                    for session_id, session in self.active_sessions.items():
-                        # Check if session has been inactive for too long
-                        if session.updated_at < current_time - timedelta(minutes=30):
-                            abandoned_sessions.append(session_id)
+                    # Re-arm sessions that have been active since their deadline was set
+                    deadline = session.updated_at + _SESSION_TIMEOUT
+                    if deadline > current_time:
+                        heapq.heappush(self._expiry_heap, (deadline, session_id))
+                        continue
                     
-                    # Clean up abandoned sessions
-                    for session_id in abandoned_sessions:
-                        session = self.active_sessions[session_id]
-                        session.status = SessionStatus.ABANDONED
-                        await self.release_session(session_id)
-                        
-                        logger.info(
-                            "session_abandoned",
-                            session_id=session_id,
-                            last_activity=session.updated_at.isoformat()
-                        )
-                
+                    # Clean up the abandoned session
+                    session.status = SessionStatus.ABANDONED
+                    self._release(session.id)
+                    
+                    logger.info(
+                        "session_abandoned",
+                        session_id=session.id,
+                        last_activity=session.updated_at.isoformat()
+                    )
+            
             except asyncio.CancelledError:
                 break
             except Exception as e:
@@ -264,36 +379,43 @@ class StateManager:
     
     async def _metrics_aggregation_loop(self):
         """Background task to aggregate metrics."""
+        previous_requests = 0
+        previous_successful = 0
+        
         while True:
             try:
                 await asyncio.sleep(60)  # Run every minute
                 
-                # Aggregate agent metrics
+                # Sample the agents' raw counters; agents update them without
+                # locks and nothing here blocks them
                 total_requests = 0
                 total_successful = 0
-                total_response_time = 0.0
+                total_response_time_ns = 0
                 
                 for agent in self.agents.values():
-                    metrics = agent.get_metrics()
-                    total_requests += metrics["total_requests"]
-                    total_successful += metrics["successful_responses"]
-                    
-                    if metrics["successful_responses"] > 0:
-                        total_response_time += (
-                            metrics["average_response_time"] *
-                            metrics["successful_responses"]
-                        )
+                    metrics = agent.metrics
+                    total_requests += metrics.total_requests
+                    total_successful += metrics.successful_responses
+                    total_response_time_ns += metrics.total_response_time_ns
                 
                 # Update system metrics
                 if total_successful > 0:
-                    avg_response_time = total_response_time / total_successful
+                    avg_response_time = total_response_time_ns / total_successful / 1e9
                     logger.info(
                         "metrics_aggregated",
                         total_requests=total_requests,
                         total_successful=total_successful,
+                        interval_requests=total_requests - previous_requests,
+                        interval_successful=total_successful - previous_successful,
                         average_response_time=avg_response_time
                     )
                 
+                previous_requests = total_requests
+                previous_successful = total_successful
+                
+                # Recompute system metrics on the next read
+                self._metrics_cache = None
+            
             except asyncio.CancelledError:
                 break
             except Exception as e:
@@ -301,11 +423,28 @@ class StateManager:
     
     async def health_check(self) -> Dict[str, Any]:
         """Perform system health check."""
-        agent_health = {}
+        agents = list(self.agents.values())
         
-        # Check each agent
-        for agent_id, agent in self.agents.items():
-            agent_health[agent_id] = await agent.health_check()
+        # Check all agents concurrently
+        results = await asyncio.gather(
+            *(
+                asyncio.wait_for(agent.health_check(), _AGENT_HEALTH_TIMEOUT)
+                for agent in agents
+            ),
+            return_exceptions=True,
+        )
+        
+        agent_health = {}
+        for agent, health in zip(agents, results):
+            if isinstance(health, BaseException):
+                health = {
+                    "status": "unhealthy",
+                    "agent_id": agent.agent_id,
+                    "agent_type": agent.agent_type,
+                    "error": str(health) or type(health).__name__,
+                    "timestamp": self._iso_now(),
+                }
+            agent_health[agent.agent_id] = health
         
         # Overall system health
         unhealthy_agents = [
@@ -317,7 +456,7 @@ class StateManager:
         
         return {
             "status": system_status,
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": self._iso_now(),
             "metrics": self.get_system_metrics(),
             "agent_health": agent_health,
             "unhealthy_agents": unhealthy_agents,
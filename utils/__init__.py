@@ -1,3 +1,3 @@
-from .logging_config import get_logger, setup_logging
+from .logging_config import add_correlation_id, get_logger, setup_logging
 
-__all__ = ["get_logger", "setup_logging"]
\ No newline at end of file
+__all__ = ["add_correlation_id", "get_logger", "setup_logging"]
\ No newline at end of file
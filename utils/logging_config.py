@@ -1,11 +1,30 @@
 import sys
+import orjson
 import structlog
-from structlog.stdlib import LoggerFactory
-from pythonjsonlogger import jsonlogger
+from structlog.stdlib import LoggerFactory, ProcessorFormatter
 import logging
 from typing import Any, Dict
 
 
+def _orjson_dumps(obj: Any, **kwargs: Any) -> str:
+    """Serialize a log event with orjson for structlog's JSONRenderer."""
+    return orjson.dumps(
+        obj, default=kwargs.get("default"), option=orjson.OPT_NON_STR_KEYS
+    ).decode()
+
+
+_timestamper = structlog.processors.TimeStamper(fmt="iso")
+
+
+def _add_standard_fields(
+    logger: Any, method_name: str, event_dict: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Add the log level, logger name and timestamp in a single processor step."""
+    event_dict = structlog.stdlib.add_log_level(logger, method_name, event_dict)
+    event_dict = structlog.stdlib.add_logger_name(logger, method_name, event_dict)
+    return _timestamper(logger, method_name, event_dict)
+
+
 def setup_logging(log_level: str = "INFO", json_logs: bool = True):
     """
     Configure structured logging for the application.
@@ -22,50 +41,45 @@ def setup_logging(log_level: str = "INFO", json_logs: bool = True):
     for handler in root_logger.handlers[:]:
         root_logger.removeHandler(handler)
     
-    # Create console handler
-    console_handler = logging.StreamHandler(sys.stdout)
-    
-    if json_logs:
-        # JSON formatter for production
-        formatter = jsonlogger.JsonFormatter(
-            fmt="%(timestamp)s %(level)s %(name)s %(message)s",
-            rename_fields={"levelname": "level", "asctime": "timestamp"},
-        )
-    else:
-        # Human-readable formatter for development
-        formatter = logging.Formatter(
-            fmt="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-            datefmt="%Y-%m-%d %H:%M:%S"
-        )
-    
-    console_handler.setFormatter(formatter)
-    root_logger.addHandler(console_handler)
-    
-    # Configure structlog
-    processors = [
-        structlog.stdlib.add_log_level,
-        structlog.stdlib.add_logger_name,
-        structlog.stdlib.PositionalArgumentsFormatter(),
-        structlog.processors.TimeStamper(fmt="iso"),
-        structlog.processors.StackInfoRenderer(),
+    # Processors shared by structlog events and foreign stdlib records;
+    # positional arguments are already formatted by the bound logger and
+    # stdlib, and no call site requests stack info
+    shared_processors = [
+        structlog.contextvars.merge_contextvars,
+        _add_standard_fields,
         structlog.processors.format_exc_info,
         structlog.processors.UnicodeDecoder(),
     ]
     
     if json_logs:
-        processors.append(structlog.processors.JSONRenderer())
+        # JSON renderer for production
+        renderer = structlog.processors.JSONRenderer(serializer=_orjson_dumps)
     else:
-        processors.append(structlog.dev.ConsoleRenderer())
+        # Human-readable renderer for development
+        renderer = structlog.dev.ConsoleRenderer()
+    
+    # Render every record once, in the handler, so structlog events are not
+    # wrapped in a second JSON document by the stdlib formatter
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setFormatter(
+        ProcessorFormatter(
+            foreign_pre_chain=shared_processors,
+            processors=[ProcessorFormatter.remove_processors_meta, renderer],
+        )
+    )
+    root_logger.addHandler(console_handler)
     
+    # Configure structlog; calls below the level return before any processor runs
     structlog.configure(
-        processors=processors,
+        processors=[*shared_processors, ProcessorFormatter.wrap_for_formatter],
+        wrapper_class=structlog.make_filtering_bound_logger(root_logger.level),
         context_class=dict,
         logger_factory=LoggerFactory(),
         cache_logger_on_first_use=True,
     )
 
 
-def get_logger(name: str) -> structlog.stdlib.BoundLogger:
+def get_logger(name: str) -> structlog.typing.FilteringBoundLogger:
     """
     Get a configured logger instance.
     